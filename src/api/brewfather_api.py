@@ -1,11 +1,115 @@
 import requests
+from requests.adapters import HTTPAdapter
+import json
 import os
+import sqlite3
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Any
+from urllib.parse import urlencode
 import sys
 import shutil
 from dotenv import load_dotenv
 
+from models import Batch
+from db.sqlite_db import get_http_cache, put_http_cache, touch_http_cache, upsert_batch_raw
+
+
+# Status que valem nova tentativa (rate limit e falhas transitórias do servidor)
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+BASE_URL_PADRAO = "https://api.brewfather.app/v2"
+
+# Projeção usada nas listagens: só o que listBatches/sincronização usam
+CAMPOS_LISTA = ['_id', 'batchNo', 'brewDate', 'brewer', 'recipe.name', 'recipe._id', '_timemodified']
+
+_sessao: Optional[requests.Session] = None
+_sessao_lock = threading.Lock()
+
+
+def obter_sessao(pool_maxsize: Optional[int] = None) -> requests.Session:
+    """Sessão HTTP compartilhada pelo processo (keep-alive + pool de conexões)."""
+    global _sessao
+    with _sessao_lock:
+        if _sessao is None:
+            if pool_maxsize is None:
+                # Comporta todas as requisições simultâneas de listBatches_details
+                pool_maxsize = max(10, int(os.getenv('BREWFATHER_MAX_IN_FLIGHT', '8')))
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+            sessao.mount('https://', adaptador)
+            sessao.mount('http://', adaptador)
+            _sessao = sessao
+        return _sessao
+
+
+class BaldeTokens:
+    """
+    Token bucket compartilhado: `taxa` requisições por segundo com rajada de
+    até `capacidade`. Quem chega sem token reserva o próximo e dorme até ele
+    (fila em ordem de chegada) em vez de arriscar um 429.
+    """
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = max(1.0, capacidade)
+        self.tokens = self.capacidade
+        self.atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> float:
+        """Consome um token, esperando se preciso. Retorna quantos segundos esperou."""
+        if self.taxa <= 0:
+            return 0.0
+        with self._lock:
+            agora = time.monotonic()
+            self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+            self.atualizado = agora
+            self.tokens -= 1
+            espera = -self.tokens / self.taxa if self.tokens < 0 else 0.0
+        if espera:
+            time.sleep(espera)
+        return espera
+
+
+_balde: Optional[BaldeTokens] = None
+
+
+def obter_balde() -> BaldeTokens:
+    """Orçamento de requisições do processo (BREWFATHER_RATE_LIMIT por hora, 0 desliga)."""
+    global _balde
+    with _sessao_lock:
+        if _balde is None:
+            por_hora = float(os.getenv('BREWFATHER_RATE_LIMIT', '500'))
+            _balde = BaldeTokens(por_hora / 3600.0, float(os.getenv('BREWFATHER_RATE_BURST', '50')))
+        return _balde
+
+
+def _chave_endpoint(endpoint: str) -> str:
+    """Normaliza o endpoint para as métricas: sem query string e sem IDs (/batches/{id})."""
+    partes = endpoint.split('?', 1)[0].strip('/').split('/')
+    if len(partes) > 1:
+        partes[1] = '{id}'
+    return '/' + '/'.join(partes)
+
+
+def _segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Interpreta o header Retry-After (segundos ou data HTTP)."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 
 def get_base_dir():
@@ -35,7 +139,10 @@ def ensure_env_file():
     return env_path
 
 class BrewfatherAPI:
-    def __init__(self):
+    def __init__(self, timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 cache_ttl: Optional[float] = None, offline: Optional[bool] = None,
+                 base_url: Optional[str] = None, rate_limit: Optional[float] = None):
         
         # Se não encontrar, tenta carregar da pasta ./_internal
         # útil para empacotamento com PyInstaller
@@ -45,36 +152,290 @@ class BrewfatherAPI:
         
         self.user_id = os.getenv('BREWFATHER_USER_ID')
         self.api_key = os.getenv('BREWFATHER_API_KEY')
-        self.base_url = "https://api.brewfather.app/v2"
+        # Permite apontar para outro servidor (ex.: api/fake_brewfather.py em testes e benchmarks)
+        self.base_url = (base_url or os.getenv('BREWFATHER_BASE_URL') or BASE_URL_PADRAO).rstrip('/')
         
         if not self.user_id or not self.api_key:
             raise ValueError("Credenciais não encontradas no arquivo .env")
 
+        # (conexão, leitura) em segundos; uma requisição travada não segura mais a GUI
+        leitura = timeout if timeout is not None else float(os.getenv('BREWFATHER_TIMEOUT', '30'))
+        self.timeout = (min(10.0, leitura), leitura)
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('BREWFATHER_MAX_RETRIES', '4'))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = obter_sessao()
+        # O orçamento (500/h) é da API Brewfather: outro servidor (ex.: o falso, em benchmarks)
+        # não é limitado, a menos que `rate_limit` (requisições por hora) seja passado
+        if rate_limit is not None:
+            self.balde = BaldeTokens(rate_limit / 3600.0, float(os.getenv('BREWFATHER_RATE_BURST', '50')))
+        elif self.base_url == BASE_URL_PADRAO:
+            self.balde = obter_balde()
+        else:
+            self.balde = BaldeTokens(0, 1)
+
+        # Single-flight: chamadas idênticas simultâneas esperam a que já está em voo
+        self._em_voo: Dict[tuple, Dict[str, Any]] = {}
+        self._em_voo_lock = threading.Lock()
+
+        # Cache de respostas em disco (segundos) e modo offline explícito
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv('BREWFATHER_CACHE_TTL', '60'))
+        self.offline = offline if offline is not None else os.getenv('BREWFATHER_OFFLINE', '').lower() in ('1', 'true', 'sim')
+        self._estado = threading.local()
+
+        self._metricas: Dict[str, Dict[str, Any]] = {}
+        self._metricas_lock = threading.Lock()
+
     
     def _get_auth(self) -> tuple:
         """Retorna as credenciais para autenticação básica"""
         return (self.user_id, self.api_key)
     
-    def _make_request(self, endpoint: str) -> Optional[Dict]:
-        """Faz uma requisição para a API"""
+    def _metrica(self, endpoint: str) -> Dict[str, Any]:
+        # Chamar com _metricas_lock adquirido
+        return self._metricas.setdefault(_chave_endpoint(endpoint), {
+            'requisicoes': 0, 'retries': 0, 'erros': 0, 'tempo_total': 0.0, 'tempo_max': 0.0,
+            'coalescidas': 0, 'limitadas': 0, 'espera_limite': 0.0,
+        })
+
+    def _registrar_metrica(self, endpoint: str, duracao: float, tentativas: int, erro: bool) -> None:
+        with self._metricas_lock:
+            m = self._metrica(endpoint)
+            m['requisicoes'] += 1
+            m['retries'] += tentativas - 1
+            m['erros'] += int(erro)
+            m['tempo_total'] += duracao
+            m['tempo_max'] = max(m['tempo_max'], duracao)
+
+    def _contar(self, endpoint: str, campo: str, valor: float = 1) -> None:
+        with self._metricas_lock:
+            self._metrica(endpoint)[campo] += valor
+
+    def estatisticas(self) -> Dict[str, Dict[str, Any]]:
+        """Latência, retries, chamadas coalescidas e limitadas por endpoint desde a criação do cliente."""
+        with self._metricas_lock:
+            return {
+                chave: dict(m, tempo_medio=m['tempo_total'] / m['requisicoes'] if m['requisicoes'] else 0.0)
+                for chave, m in self._metricas.items()
+            }
+
+    def _espera_backoff(self, tentativa: int, response: Optional[requests.Response] = None) -> float:
+        """Backoff exponencial com jitter; em 429 respeita o Retry-After quando houver."""
+        if response is not None and response.status_code == 429:
+            retry_after = _segundos_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        teto = min(self.backoff_max, self.backoff_base * (2 ** tentativa))
+        return random.uniform(0, teto)
+
+    def _buscar(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """GET com sessão compartilhada, timeout e retries. Retorna a resposta (200/304) ou None."""
         url = f"{self.base_url}{endpoint}"
-        
+        inicio = time.perf_counter()
+        tentativa = 0
+
+        while True:
+            tentativa += 1
+            response = None
+            espera = self.balde.adquirir()
+            if espera:
+                self._contar(endpoint, 'limitadas')
+                self._contar(endpoint, 'espera_limite', espera)
+            try:
+                response = self.session.get(url, auth=self._get_auth(), timeout=self.timeout, headers=headers)
+                if response.status_code in STATUS_RETENTAVEIS and tentativa <= self.max_retries:
+                    espera = self._espera_backoff(tentativa - 1, response)
+                    print(f"Status {response.status_code} em {endpoint}; nova tentativa em {espera:.1f}s")
+                    time.sleep(espera)
+                    continue
+                response.raise_for_status()
+                self._registrar_metrica(endpoint, time.perf_counter() - inicio, tentativa, False)
+                return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if tentativa <= self.max_retries:
+                    espera = self._espera_backoff(tentativa - 1)
+                    print(f"Falha de conexão em {endpoint} ({e}); nova tentativa em {espera:.1f}s")
+                    time.sleep(espera)
+                    continue
+                print(f"Erro na requisição: {e}")
+            except requests.exceptions.RequestException as e:
+                print(f"Erro na requisição: {e}")
+            self._registrar_metrica(endpoint, time.perf_counter() - inicio, tentativa, True)
+            return None
+
+    @property
+    def ultima_resposta_obsoleta(self) -> bool:
+        """True se a última chamada desta thread foi atendida com cache vencido (offline/falha de rede)."""
+        return getattr(self._estado, 'obsoleta', False)
+
+    def _ler_cache(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        try:
+            return get_http_cache(endpoint)
+        except sqlite3.Error:
+            return None
+
+    def _make_request(self, endpoint: str, usar_cache: bool = True) -> Optional[Dict]:
+        """
+        Faz uma requisição para a API. Se a mesma chamada já estiver em andamento
+        em outra thread (ex.: clique duplo na GUI), espera por ela e devolve o
+        mesmo resultado em vez de gastar outra requisição.
+        """
+        chave = (endpoint, usar_cache)
+        with self._em_voo_lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = {'evento': threading.Event(), 'resultado': None, 'obsoleta': False}
+
+        if not lider:
+            self._contar(endpoint, 'coalescidas')
+            voo['evento'].wait()
+            self._estado.obsoleta = voo['obsoleta']
+            return voo['resultado']
+
+        try:
+            voo['resultado'] = self._requisitar(endpoint, usar_cache)
+            voo['obsoleta'] = self.ultima_resposta_obsoleta
+        finally:
+            with self._em_voo_lock:
+                del self._em_voo[chave]
+            voo['evento'].set()
+        return voo['resultado']
+
+    def _requisitar(self, endpoint: str, usar_cache: bool = True) -> Optional[Dict]:
+        """
+        Faz uma requisição para a API passando pelo cache em disco (SQLite):
+        dentro do TTL responde direto do cache; depois revalida com
+        If-None-Match/If-Modified-Since. Em modo offline, ou se a rede falhar,
+        serve o que houver em cache e marca `ultima_resposta_obsoleta`.
+        """
+        self._estado.obsoleta = False
+        chave = f"{self.base_url}{endpoint}"  # servidores diferentes não dividem cache
+        cache = self._ler_cache(chave) if usar_cache else None
+        idade = time.time() - cache['fetched_at'] if cache else None
+
+        if cache and (self.offline or idade < self.cache_ttl):
+            self._estado.obsoleta = idade >= self.cache_ttl
+            return json.loads(cache['body'])
+        if self.offline:
+            print(f"Modo offline: sem dados em cache para {endpoint}")
+            return None
+
+        headers = {}
+        if cache and cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache and cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+
+        response = self._buscar(endpoint, headers)
+        if response is None:
+            if cache:
+                print(f"Usando dados em cache para {endpoint} (de {datetime.fromtimestamp(cache['fetched_at']):%d/%m/%Y %H:%M})")
+                self._estado.obsoleta = True
+                return json.loads(cache['body'])
+            return None
+
+        agora = time.time()
+        if response.status_code == 304 and cache:
+            try:
+                touch_http_cache(chave, agora)
+            except sqlite3.Error:
+                pass
+            return json.loads(cache['body'])
+
         try:
-            response = requests.get(url, auth=self._get_auth())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            dados = response.json()
+        except ValueError as e:
             print(f"Erro na requisição: {e}")
             return None
+        if usar_cache:
+            try:
+                put_http_cache(chave, response.content, response.headers.get('ETag'),
+                               response.headers.get('Last-Modified'), agora)
+            except sqlite3.Error:
+                pass
+        return dados
     
-    def GetBatches(self, limit: int = 1) -> Optional[Dict]:
+    def GetBatches(self, limit: int = 1, complete: bool = False) -> Optional[Dict]:
         """
-        Obtém todos os batches em formato JSON
+        Obtém os batches mais recentes em formato JSON. Por padrão vem só a
+        projeção de CAMPOS_LISTA; `complete=True` traz os documentos inteiros
+        (receita, leituras, notas), que só devem ser pedidos sob demanda.
         """
-        endpoint = f"/batches?complete=True&order_by_direction=desc&limit={limit}"
-        return self._make_request(endpoint)
+        params = {'order_by_direction': 'desc', 'limit': limit}
+        if complete:
+            params['complete'] = 'True'
+        else:
+            params['include'] = ','.join(CAMPOS_LISTA)
+        return self._make_request(f"/batches?{urlencode(params)}")
     
-    def listBatches(self, limit: int = 1) -> Optional[List[Dict]]:
+    def _iterar_colecao(self, colecao: str, page_size: int = 50, complete: bool = False, order_by: str = '_id',
+                        start_after: Optional[Any] = None, include: Optional[List[str]] = None,
+                        ja_vistos: Iterable[str] = ()) -> Iterator[Dict]:
+        page_size = max(1, min(page_size, 50))  # limite máximo da API
+        # Fora o _id, o campo de ordenação pode empatar (ex.: _timemodified) e o start_after
+        # da API é estrito: o cursor passa a incluir o próprio valor e os _id já entregues
+        # com esse valor são descartados, para nenhum empate na fronteira da página se perder.
+        desempate = order_by != '_id'
+        cursor = start_after
+        vistos = set(ja_vistos)
+        travado = False
+        while True:
+            params = {'limit': page_size, 'order_by': order_by}
+            if complete:
+                params['complete'] = 'True'
+            elif include:
+                params['include'] = ','.join(include)
+            if cursor is not None:
+                params['start_after'] = cursor - 1 if desempate and isinstance(cursor, int) and not travado else cursor
+            # Sincronização sempre vai à rede: o cache serve às telas, não ao histórico
+            pagina = self._make_request(f"/{colecao}?{urlencode(params)}", usar_cache=False)
+            if pagina is None:
+                raise RuntimeError(f"Falha ao buscar página de {colecao} (start_after={cursor})")
+            novos = [item for item in pagina
+                     if not (desempate and item.get(order_by) == cursor and item.get('_id') in vistos)]
+            yield from novos
+            if len(pagina) < page_size:
+                return
+            ultimo = pagina[-1].get(order_by)
+            if ultimo is None:
+                return
+            # Uma página inteira de empates já entregues: só dá para seguir pulando o valor
+            travado = desempate and not novos
+            if travado:
+                print(f"⚠️  Uma página inteira ({page_size}) de {colecao} com {order_by}={cursor}; empates além dela ficam de fora.")
+            if desempate:
+                fronteira = {item.get('_id') for item in pagina if item.get(order_by) == ultimo}
+                vistos = fronteira | vistos if ultimo == cursor else fronteira
+            cursor = ultimo
+
+    def iterar_batches(self, page_size: int = 50, complete: bool = False, order_by: str = '_id',
+                       start_after: Optional[Any] = None, include: Optional[List[str]] = None,
+                       ja_vistos: Iterable[str] = ()) -> Iterator[Dict]:
+        """
+        Percorre todo o histórico de batches página a página (cursor start_after),
+        devolvendo cada batch assim que a página chega. Só uma página fica em memória.
+        Levanta RuntimeError se uma página falhar, para quem sincroniza não
+        confundir falha com fim do histórico.
+
+        `start_after` começa depois desse valor de `order_by` (ex.: um
+        `_timemodified` já visto) e `include` pede campos extras na listagem.
+        Quando `order_by` não é único, o valor de `start_after` também volta e
+        só os `_id` de `ja_vistos` são descartados.
+        """
+        return self._iterar_colecao('batches', page_size, complete, order_by, start_after, include, ja_vistos)
+
+    def iterar_recipes(self, page_size: int = 50, complete: bool = True, order_by: str = '_timemodified',
+                       start_after: Optional[Any] = None, ja_vistos: Iterable[str] = ()) -> Iterator[Dict]:
+        """Como `iterar_batches`, para o catálogo de receitas (documentos completos por padrão)."""
+        return self._iterar_colecao('recipes', page_size, complete, order_by, start_after, ja_vistos=ja_vistos)
+
+    def iterar_lotes(self, page_size: int = 50) -> Iterator[Batch]:
+        """Como `iterar_batches`, mas já no formato de `listBatches`."""
+        for batch in self.iterar_batches(page_size, include=CAMPOS_LISTA):
+            yield Batch.from_api(batch)
+
+    def listBatches(self, limit: int = 1) -> Optional[List[Batch]]:
         """
         Lista batches com campos específicos
         """
@@ -83,18 +444,7 @@ class BrewfatherAPI:
         if not batches_data:
             return None
         
-        formatted_batches = []
-        for batch in batches_data:
-            formatted_batch = {
-                '_id': batch.get('_id'),
-                'brewer': batch.get('brewer'),
-                'batchNo': batch.get('batchNo'),
-                'brewDate': datetime.fromtimestamp(batch.get('brewDate') / 1000).strftime('%d/%m/%Y') if batch.get('brewDate') else None,             
-                'recipe_name': batch.get('recipe', {}).get('name') if batch.get('recipe') else None
-            }
-            formatted_batches.append(formatted_batch)
-        
-        return formatted_batches
+        return [Batch.from_api(batch) for batch in batches_data]
     
     def GetBatch(self, batch_id: str) -> Optional[Dict]:
         """
@@ -102,74 +452,63 @@ class BrewfatherAPI:
         """
         endpoint = f"/batches/{batch_id}"
         return self._make_request(endpoint)
+
+    def GetBatchReadings(self, batch_id: str) -> Optional[List[Dict]]:
+        """
+        Obtém as leituras (densidade/temperatura dos densímetros) de um batch.
+        Sempre vai à rede: leituras mudam o tempo todo durante a fermentação.
+        """
+        return self._make_request(f"/batches/{batch_id}/readings", usar_cache=False)
     
-    def listBatch(self, batch_id: str) -> Optional[Dict]:
+    def listBatch(self, batch_id: str) -> Optional[Batch]:
         """
-        Lista um batch específico com campos específicos
+        Lista um batch específico com campos específicos. O documento completo
+        é guardado comprimido em batch_raw para reprocessamento sem rede.
         """
         batch_data = self.GetBatch(batch_id)
         
         if not batch_data:
             return None
-        
-        
-  
-        # Processar eventos para encontrar o evento de bottling
-        bottling_event = None
-        envase_via_notes = None
-        envase_via_notes = batch_data.get('notes', [])
-        for note in envase_via_notes:
-            if note.get('status') == 'Conditioning':
-                data_envase_via_notes = note.get('timestamp', None)
-                break        
-        
-        
-        events = batch_data.get('events', [])
-        for event in events:
-            if event.get('eventType') == 'event-batch-bottling-day':
-                bottling_event = event
-                break
-        
-        # Converter timestamp para data e hora se existir
-        bottling_time = None
-        if data_envase_via_notes != None:
-            try:
-                bottling_time = datetime.fromtimestamp(data_envase_via_notes / 1000)
-            except (ValueError, TypeError):
-                bottling_time = None
-        elif bottling_event and 'time' in bottling_event:
-            try:
-                bottling_time = datetime.fromtimestamp(bottling_event['time'] / 1000)
-            except (ValueError, TypeError):
-                bottling_time = None
-        
-        formatted_batch = {
-            '_id': batch_data.get('_id'),
-            'batchNo': batch_data.get('batchNo'),
-            'brewDate': datetime.fromtimestamp(batch_data.get('brewDate') / 1000).strftime('%d/%m/%Y') if batch_data.get('brewDate') else None,             
-            'name': batch_data.get('recipe', {}).get('name') if batch_data.get('recipe') else None,
-            'measuredAbv': batch_data.get('measuredAbv'),
-            'estimatedIbu': batch_data.get('estimatedIbu'),
-            'estimatedColor': batch_data.get('estimatedColor'),           
-            'bottling_event': {
-            'eventType': 'event-batch-bottling-day' if bottling_event else None,
-            'time': bottling_time.strftime('%d/%m/%Y %H:%M:%S') if bottling_time else None,
-            'timestamp': bottling_event.get('time') if bottling_event else None
-        } if bottling_event else None
-        }
-        
-        return formatted_batch
+
+        try:
+            upsert_batch_raw(batch_data)
+        except sqlite3.Error as e:
+            print(f"⚠️  Falha ao arquivar batch {batch_id}: {e}")
+
+        return Batch.from_api(batch_data)
     
+    def listBatches_details(self, ids: List[str], max_in_flight: Optional[int] = None) -> List[Dict]:
+        """
+        Busca os detalhes (listBatch) de vários batches em paralelo, com no máximo
+        `max_in_flight` requisições simultâneas (padrão BREWFATHER_MAX_IN_FLIGHT ou 8).
+        Retorna um item por id, na mesma ordem: {'_id', 'batch', 'erro'}; uma
+        falha num lote não interrompe os demais.
+        """
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv('BREWFATHER_MAX_IN_FLIGHT', '8'))
+        max_in_flight = max(1, max_in_flight)
+
+        def buscar(batch_id: str) -> Dict:
+            try:
+                batch = self.listBatch(batch_id)
+            except Exception as e:
+                return {'_id': batch_id, 'batch': None, 'erro': str(e)}
+            return {'_id': batch_id, 'batch': batch, 'erro': None if batch else 'falha na requisição'}
+
+        if not ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(ids))) as pool:
+            return list(pool.map(buscar, ids))
+
     def get_batch_ids(self) -> Optional[List[str]]:
         """
-        Retorna uma lista de IDs dos batches disponíveis
+        Retorna uma lista de IDs de todos os batches (histórico completo)
         """
-        batches_data = self.GetBatches()
-        
-        if not batches_data:
+        try:
+            return [batch.get('_id') for batch in self.iterar_batches() if batch.get('_id')]
+        except RuntimeError as e:
+            print(f"Erro na requisição: {e}")
             return None
-        
-        return [batch.get('_id') for batch in batches_data if batch.get('_id')]
 
 # Exemplo de uso da classe
 if __name__ == "__main__":
@@ -0,0 +1,304 @@
+"""
+Servidor local que imita a Brewfather API v2 (somente leitura: /batches,
+/batches/{id}, /batches/{id}/readings, /recipes e /recipes/{id}), para testes
+e benchmarks do BrewfatherAPI sem rede e sem credenciais reais.
+
+Uso:
+    python src/api/fake_brewfather.py --lotes 500 --latencia 0.05 --taxa-429 0.02
+
+e no .env (ou no construtor): BREWFATHER_BASE_URL=http://127.0.0.1:8799/v2
+Qualquer usuário/chave é aceito, mas a autenticação básica é obrigatória.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import string
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+# Campos que a API devolve na listagem sem complete=True
+CAMPOS_PADRAO_LISTA = ['_id', 'name', 'batchNo', 'status', 'brewer', 'brewDate', 'recipe.name']
+CAMPOS_PADRAO_RECEITAS = ['_id', 'name', 'author', 'type', 'equipment.name', 'style.name']
+
+ESTILOS = [
+    ('American IPA', 40, 70, 12, 28), ('Weizen', 8, 15, 4, 10), ('Dry Stout', 25, 45, 60, 100),
+    ('Pilsner', 25, 40, 4, 8), ('Saison', 20, 35, 8, 14), ('Red Ale', 20, 35, 20, 35),
+]
+LUPULOS = ['Citra', 'Mosaic', 'Cascade', 'Saaz', 'Hallertau', 'Simcoe', 'Galaxy']
+LEVEDURAS = ['US-05', 'WB-06', 'S-04', 'W-34/70', 'BE-134', 'Nottingham']
+
+
+def _novo_id(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(string.ascii_letters + string.digits) for _ in range(30))
+
+
+def gerar_receitas(quantidade: int, rnd: random.Random, agora: int) -> List[Dict[str, Any]]:
+    """Catálogo de receitas sintéticas (cada uma é reutilizada por vários batches)."""
+    receitas = []
+    for n in range(1, quantidade + 1):
+        estilo, ibu_min, ibu_max, cor_min, cor_max = rnd.choice(ESTILOS)
+        receitas.append({
+            '_id': _novo_id(rnd),
+            '_type': 'recipe',
+            '_timemodified': agora - rnd.randint(30, 900) * 24 * 3600 * 1000,
+            'name': f'{estilo} #{n}',
+            'style': {'name': estilo},
+            'ibu': rnd.randint(ibu_min, ibu_max),
+            'color': round(rnd.uniform(cor_min, cor_max), 1),
+            'hops': [{'name': h, 'amount': rnd.randint(10, 80)} for h in rnd.sample(LUPULOS, 3)],
+            'yeasts': [{'name': rnd.choice(LEVEDURAS)}],
+        })
+    return receitas
+
+
+def gerar_fixtures(quantidade: int = 200, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera batches sintéticos no formato da API (receita, notas e eventos)."""
+    rnd = random.Random(seed)
+    agora = int(time.time() * 1000)
+    dia = 24 * 3600 * 1000
+    receitas = gerar_receitas(max(3, quantidade // 5), rnd, agora)
+    batches = []
+    for n in range(1, quantidade + 1):
+        receita = rnd.choice(receitas)
+        brew_date = agora - (quantidade - n) * 7 * dia - rnd.randint(0, 3) * dia
+        fermentando = brew_date + dia
+        envase = brew_date + rnd.randint(10, 21) * dia
+        og = round(rnd.uniform(1.040, 1.075), 3)
+        fg = round(rnd.uniform(1.006, 1.016), 3)
+        batches.append({
+            '_id': _novo_id(rnd),
+            '_type': 'batch',
+            # Nunca no futuro: a marca d'água da sincronização incremental ignoraria edições posteriores
+            '_timemodified': min(envase + rnd.randint(0, 5) * dia, agora),
+            'name': 'Batch',
+            'batchNo': n,
+            'status': 'Completed' if envase < agora else 'Fermenting',
+            'brewer': rnd.choice(['Ana', 'Bruno', 'Carla']),
+            'brewDate': brew_date,
+            'measuredOg': og,
+            'measuredFg': fg,
+            'measuredAbv': round((og - fg) * 131.25, 1),
+            'estimatedIbu': receita['ibu'],
+            'estimatedColor': receita['color'],
+            # O batch guarda uma cópia da receita, como na API real
+            'recipe': json.loads(json.dumps(receita)),
+            'notes': [
+                {'status': 'Planning', 'timestamp': brew_date - dia, 'note': ''},
+                {'status': 'Fermenting', 'timestamp': fermentando, 'note': ''},
+                {'status': 'Conditioning', 'timestamp': envase, 'note': ''},
+            ],
+            'events': [
+                {'eventType': 'event-batch-fermentation-start', 'time': fermentando, 'active': True},
+                {'eventType': 'event-batch-bottling-day', 'time': envase, 'active': True},
+            ],
+        })
+    return batches
+
+
+def gerar_leituras(batch: Dict[str, Any], intervalo_min: int = 15) -> List[Dict[str, Any]]:
+    """Leituras sintéticas de densímetro: densidade caindo da OG à FG entre o início da fermentação e o envase."""
+    inicio = next((e['time'] for e in batch.get('events', []) if e['eventType'] == 'event-batch-fermentation-start'),
+                  batch['brewDate'])
+    fim = min(next((n['timestamp'] for n in batch.get('notes', []) if n['status'] == 'Conditioning'), inicio),
+              int(time.time() * 1000))
+    og, fg = batch.get('measuredOg', 1.050), batch.get('measuredFg', 1.010)
+    passo = intervalo_min * 60 * 1000
+    rnd = random.Random(batch['_id'])
+    leituras = []
+    for t in range(inicio, fim, passo):
+        dias = (t - inicio) / (24 * 3600 * 1000)
+        sg = fg + (og - fg) * math.exp(-dias / 2.5) + rnd.uniform(-0.0005, 0.0005)
+        leituras.append({'time': t, 'sg': round(sg, 4), 'temp': round(19 + rnd.uniform(-0.5, 0.5), 1),
+                         'id': 'TILT-RED', 'type': 'Tilt', 'comment': ''})
+    return leituras
+
+
+def _projetar(batch: Dict[str, Any], campos: List[str]) -> Dict[str, Any]:
+    """Copia só os campos pedidos (caminhos com ponto, como 'recipe.name')."""
+    resultado: Dict[str, Any] = {}
+    for campo in campos:
+        origem, destino = batch, resultado
+        partes = campo.split('.')
+        for parte in partes[:-1]:
+            if not isinstance(origem.get(parte), dict):
+                break
+            origem = origem[parte]
+            destino = destino.setdefault(parte, {})
+        else:
+            if partes[-1] in origem:
+                destino[partes[-1]] = origem[partes[-1]]
+    return resultado
+
+
+class FakeBrewfather:
+    """Estado do servidor falso: fixtures, injeção de falhas e contadores."""
+
+    def __init__(self, batches: Optional[List[Dict[str, Any]]] = None, latencia: float = 0.0,
+                 jitter: float = 0.0, taxa_erro: float = 0.0, taxa_429: float = 0.0,
+                 retry_after: int = 1, seed: int = 42):
+        self.batches = batches if batches is not None else gerar_fixtures(seed=seed)
+        self.por_id = {b['_id']: b for b in self.batches}
+        self.recipes = list({b['recipe']['_id']: b['recipe'] for b in self.batches if b.get('recipe')}.values())
+        self.recipes_por_id = {r['_id']: r for r in self.recipes}
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self.contadores = {'requisicoes': 0, 'erros_injetados': 0, 'rate_limited': 0, 'nao_modificado': 0}
+
+    def _contar(self, chave: str) -> None:
+        with self._lock:
+            self.contadores[chave] += 1
+
+    def sortear_falha(self) -> Optional[int]:
+        with self._lock:
+            sorteio = self._rnd.random()
+        if sorteio < self.taxa_429:
+            self._contar('rate_limited')
+            return 429
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            self._contar('erros_injetados')
+            return 500
+        return None
+
+    def listar(self, params: Dict[str, str], colecao: str = 'batches') -> List[Dict[str, Any]]:
+        itens = self.recipes if colecao == 'recipes' else self.batches
+        limit = max(1, min(int(params.get('limit', 10)), 50))
+        order_by = params.get('order_by', '_id')
+        desc = params.get('order_by_direction', 'asc') == 'desc'
+        start_after = params.get('start_after')
+
+        ordenados = sorted(itens, key=lambda b: b.get(order_by) or 0, reverse=desc)
+        if start_after is not None:
+            valor = type(ordenados[0].get(order_by))(start_after) if ordenados else start_after
+            ordenados = [b for b in ordenados if (b.get(order_by) < valor if desc else b.get(order_by) > valor)]
+        pagina = ordenados[:limit]
+
+        if params.get('complete', '').lower() == 'true':
+            return pagina
+        padrao = CAMPOS_PADRAO_RECEITAS if colecao == 'recipes' else CAMPOS_PADRAO_LISTA
+        campos = padrao + [c for c in params.get('include', '').split(',') if c]
+        return [_projetar(b, campos) for b in pagina]
+
+
+def _criar_handler(fake: FakeBrewfather):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, como a API real
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status: int, corpo: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+            dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(dados)))
+            for chave, valor in (headers or {}).items():
+                self.send_header(chave, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            fake._contar('requisicoes')
+            if fake.latencia or fake.jitter:
+                time.sleep(fake.latencia + random.uniform(0, fake.jitter))
+            if not self.headers.get('Authorization', '').startswith('Basic '):
+                return self._responder(401, {'message': 'Unauthorized'})
+
+            falha = fake.sortear_falha()
+            if falha == 429:
+                return self._responder(429, {'message': 'Too Many Requests'}, {'Retry-After': str(fake.retry_after)})
+            if falha:
+                return self._responder(falha, {'message': 'Internal Server Error'})
+
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            partes = [p for p in url.path.split('/') if p]
+            if partes and partes[0] == 'v2':
+                partes = partes[1:]
+
+            if partes in (['batches'], ['recipes']):
+                return self._responder(200, fake.listar(params, partes[0]))
+            if len(partes) == 2 and partes[0] == 'recipes':
+                receita = fake.recipes_por_id.get(partes[1])
+                if receita is None:
+                    return self._responder(404, {'message': 'Not found'})
+                return self._responder(200, receita)
+            if len(partes) == 3 and partes[0] == 'batches' and partes[2] == 'readings':
+                batch = fake.por_id.get(partes[1])
+                if batch is None:
+                    return self._responder(404, {'message': 'Not found'})
+                return self._responder(200, gerar_leituras(batch))
+            if len(partes) == 2 and partes[0] == 'batches':
+                batch = fake.por_id.get(partes[1])
+                if batch is None:
+                    return self._responder(404, {'message': 'Not found'})
+                etag = '"%s"' % hashlib.sha1(str(batch.get('_timemodified')).encode()).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    fake._contar('nao_modificado')
+                    return self._responder(304, headers={'ETag': etag})
+                return self._responder(200, batch, {'ETag': etag})
+            return self._responder(404, {'message': 'Not found'})
+
+    return Handler
+
+
+def criar_servidor(fake: FakeBrewfather, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    servidor = ThreadingHTTPServer((host, port), _criar_handler(fake))
+    servidor.daemon_threads = True
+    return servidor
+
+
+@contextmanager
+def servidor_em_thread(fake: Optional[FakeBrewfather] = None, host: str = '127.0.0.1',
+                       port: int = 0) -> Iterator[str]:
+    """Sobe o servidor numa thread e devolve a base URL (para BrewfatherAPI(base_url=...))."""
+    servidor = criar_servidor(fake or FakeBrewfather(), host, port)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{servidor.server_port}/v2"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Servidor falso da Brewfather API v2')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--lotes', type=int, default=200, help='quantidade de batches sintéticos')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latencia', type=float, default=0.0, help='atraso fixo por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='atraso aleatório extra (s)')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='fração de respostas 500')
+    parser.add_argument('--taxa-429', type=float, default=0.0, help='fração de respostas 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeBrewfather(gerar_fixtures(args.lotes, args.seed), latencia=args.latencia, jitter=args.jitter,
+                          taxa_erro=args.taxa_erro, taxa_429=args.taxa_429, retry_after=args.retry_after,
+                          seed=args.seed)
+    servidor = criar_servidor(fake, args.host, args.port)
+    print(f"Fake Brewfather em http://{args.host}:{servidor.server_port}/v2 ({args.lotes} lotes)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print(f"Contadores: {fake.contadores}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 import os
+import json
 import sqlite3
-from typing import Any, Dict, List, Optional, Tuple
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from paths import get_app_base_dir, ensure_dir, is_frozen
+from models import Batch, BatchEvent
 from datetime import datetime
 
 
@@ -21,6 +24,14 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
+def _ensure_columns(cur: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+    """Acrescenta colunas que faltem em bancos criados por versões anteriores."""
+    existentes = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    for nome, tipo in columns.items():
+        if nome not in existentes:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {nome} {tipo}")
+
+
 def init_schema() -> None:
     conn = get_connection()
     try:
@@ -43,6 +54,14 @@ def init_schema() -> None:
             """
         )
 
+        # Catálogo de receitas: colunas acrescentadas depois da versão inicial
+        _ensure_columns(cur, 'recipes', {
+            'hops': 'TEXT',
+            'yeasts': 'TEXT',
+            'time_modified': 'INTEGER',
+            'doc': 'BLOB',
+        })
+
         # Tabela de batches (lotes)
         cur.execute(
             """
@@ -138,12 +157,122 @@ def init_schema() -> None:
             """
         )
 
+        # Fila persistente de trabalhos de impressão
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS print_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                output_paths TEXT,
+                duration REAL,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_print_jobs_status
+            ON print_jobs (status, priority DESC, id);
+            """
+        )
+
+        # Documento completo de cada batch (JSON comprimido com zlib), para
+        # reextrair campos localmente sem voltar à API
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS batch_raw (
+                batch_id TEXT PRIMARY KEY,
+                doc BLOB NOT NULL,
+                time_modified INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+
+        # Leituras de fermentação (densímetros) por batch; o índice único
+        # (batch_id, time, device) atende às consultas por período e deduplica
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS batch_readings (
+                batch_id TEXT NOT NULL,
+                time INTEGER NOT NULL,
+                device TEXT NOT NULL DEFAULT '',
+                sg REAL,
+                temp REAL,
+                comment TEXT,
+                FOREIGN KEY (batch_id) REFERENCES batches(id)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_batch_readings_batch_time
+            ON batch_readings (batch_id, time, device);
+            """
+        )
+
+        # Cache das respostas HTTP da Brewfather API (por endpoint)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                endpoint TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+
         conn.commit()
     finally:
         conn.close()
 
 
-def upsert_recipe(recipe: Optional[Dict[str, Any]]) -> Optional[str]:
+_UPSERT_RECIPE_SQL = """
+    INSERT INTO recipes (id, name, style)
+    VALUES (?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name=excluded.name,
+        style=excluded.style
+    ;
+"""
+
+# Receita citada por um batch (id e nome): garante que recipe_id aponte para uma linha sem
+# sobrescrever o que o catálogo (upsert_recipes) já gravou; o catálogo completa depois
+_INSERT_RECIPE_STUB_SQL = """
+    INSERT INTO recipes (id, name)
+    VALUES (?, ?)
+    ON CONFLICT(id) DO NOTHING
+    ;
+"""
+
+# A projeção da listagem (CAMPOS_LISTA) não traz ABV/IBU/cor: COALESCE mantém os já gravados
+_UPSERT_BATCH_SQL = """
+    INSERT INTO batches (
+        id, batch_no, brewer, brew_date, name, measured_abv, estimated_ibu, estimated_color, recipe_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        batch_no=excluded.batch_no,
+        brewer=excluded.brewer,
+        brew_date=excluded.brew_date,
+        name=excluded.name,
+        measured_abv=COALESCE(excluded.measured_abv, batches.measured_abv),
+        estimated_ibu=COALESCE(excluded.estimated_ibu, batches.estimated_ibu),
+        estimated_color=COALESCE(excluded.estimated_color, batches.estimated_color),
+        recipe_id=excluded.recipe_id
+    ;
+"""
+
+
+def _recipe_params(recipe: Optional[Dict[str, Any]]) -> Optional[tuple]:
     if not recipe:
         return None
     recipe_id = recipe.get('id') or recipe.get('_id')
@@ -152,106 +281,168 @@ def upsert_recipe(recipe: Optional[Dict[str, Any]]) -> Optional[str]:
         return None
     name = recipe.get('name')
     style = recipe.get('style', {}).get('name') if isinstance(recipe.get('style'), dict) else recipe.get('style')
+    return (recipe_id, name, style)
+
+
+def _batch_id(batch: Batch) -> str:
+    if not batch.id:
+        raise ValueError('Batch sem _id/id não pode ser persistido')
+    return batch.id
+
+
+def _nomes(itens: Any) -> Optional[str]:
+    if not isinstance(itens, list):
+        return None
+    nomes = []
+    for item in itens:
+        nome = item.get('name') if isinstance(item, dict) else None
+        if nome and nome not in nomes:
+            nomes.append(nome)
+    return ', '.join(nomes) or None
+
+
+def upsert_recipes(recipes: Iterable[Dict[str, Any]]) -> int:
+    """
+    Grava receitas completas do catálogo (nome, estilo, lúpulos, leveduras e o
+    documento comprimido). Receitas com o mesmo horário de modificação já
+    gravado não são reescritas. Retorna quantas foram inseridas/atualizadas.
+    """
+    linhas = []
+    for recipe in recipes:
+        params = _recipe_params(recipe)
+        if params is None:
+            continue
+        doc = zlib.compress(json.dumps(recipe, separators=(',', ':')).encode('utf-8'))
+        linhas.append(params + (_nomes(recipe.get('hops')), _nomes(recipe.get('yeasts')), recipe.get('_timemodified'), doc))
+    if not linhas:
+        return 0
 
     conn = get_connection()
     try:
         cur = conn.cursor()
-        cur.execute(
+        cur.executemany(
             """
-            INSERT INTO recipes (id, name, style)
-            VALUES (?, ?, ?)
+            INSERT INTO recipes (id, name, style, hops, yeasts, time_modified, doc)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(id) DO UPDATE SET
                 name=excluded.name,
-                style=excluded.style
+                style=excluded.style,
+                hops=excluded.hops,
+                yeasts=excluded.yeasts,
+                time_modified=excluded.time_modified,
+                doc=excluded.doc
+            WHERE recipes.time_modified IS NOT excluded.time_modified
             ;
             """,
-            (recipe_id, name, style),
+            linhas,
         )
         conn.commit()
-        return recipe_id
+        return cur.rowcount
     finally:
         conn.close()
 
 
-def upsert_batch(batch: Dict[str, Any]) -> str:
-    batch_id = batch.get('_id') or batch.get('id')
-    if not batch_id:
-        raise ValueError('Batch sem _id/id não pode ser persistido')
-
-    # Pode vir tanto "name" direto quanto dentro de recipe
-    recipe = batch.get('recipe') if isinstance(batch.get('recipe'), dict) else None
-    recipe_id = upsert_recipe(recipe)
-
-    name = batch.get('name') or (recipe.get('name') if recipe else None)
-
+def get_recipe_for_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Receita do catálogo ligada ao batch (por recipe_id), sem o documento completo."""
     conn = get_connection()
     try:
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO batches (
-                id, batch_no, brewer, brew_date, name, measured_abv, estimated_ibu, estimated_color, recipe_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                batch_no=excluded.batch_no,
-                brewer=excluded.brewer,
-                brew_date=excluded.brew_date,
-                name=excluded.name,
-                measured_abv=excluded.measured_abv,
-                estimated_ibu=excluded.estimated_ibu,
-                estimated_color=excluded.estimated_color,
-                recipe_id=excluded.recipe_id
-            ;
+            SELECT r.id, r.name, r.style, r.hops, r.yeasts, r.time_modified
+            FROM batches b
+            JOIN recipes r ON r.id = b.recipe_id
+            WHERE b.id = ?
             """,
-            (
-                batch_id,
-                batch.get('batchNo'),
-                batch.get('brewer'),
-                batch.get('brewDate'),  # já vem formatada no serviço listBatches/listBatch
-                name,
-                batch.get('measuredAbv'),
-                batch.get('estimatedIbu'),
-                batch.get('estimatedColor'),
-                recipe_id,
-            ),
+            (batch_id,),
         )
+        row = cur.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def upsert_recipe(recipe: Optional[Dict[str, Any]]) -> Optional[str]:
+    params = _recipe_params(recipe)
+    if params is None:
+        return None
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_UPSERT_RECIPE_SQL, params)
+        conn.commit()
+        return params[0]
+    finally:
+        conn.close()
+
+
+def upsert_batch(batch: Batch) -> str:
+    batch_id = _batch_id(batch)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        if batch.recipe_id:
+            cur.execute(_INSERT_RECIPE_STUB_SQL, (batch.recipe_id, batch.name))
+        cur.execute(_UPSERT_BATCH_SQL, batch.to_row())
         conn.commit()
         return batch_id
     finally:
         conn.close()
 
 
-def insert_batch_event(batch_id: str, event: Dict[str, Any]) -> None:
+def upsert_batches(batches: Iterable[Batch]) -> int:
+    """Upsert em lote: todos os batches (e as receitas citadas) numa única transação. Retorna quantos foram gravados."""
+    linhas = []
+    receitas = {}
+    for batch in batches:
+        _batch_id(batch)
+        linhas.append(batch.to_row())
+        if batch.recipe_id:
+            receitas[batch.recipe_id] = (batch.recipe_id, batch.name)
+    if not linhas:
+        return 0
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(_INSERT_RECIPE_STUB_SQL, receitas.values())
+        cur.executemany(_UPSERT_BATCH_SQL, linhas)
+        conn.commit()
+        return len(linhas)
+    finally:
+        conn.close()
+
+
+def insert_batch_event(batch_id: str, event: BatchEvent) -> None:
+    """Grava o evento, ignorando-o se o mesmo (tipo e horário) já existe para o batch."""
     conn = get_connection()
     try:
         cur = conn.cursor()
         cur.execute(
             """
             INSERT INTO batch_events (batch_id, event_type, time_ts, time_human)
-            VALUES (?, ?, ?, ?)
+            SELECT ?, ?, ?, ?
+            WHERE NOT EXISTS (
+                SELECT 1 FROM batch_events WHERE batch_id = ? AND event_type IS ? AND time_ts IS ?
+            )
             ;
             """,
-            (
-                batch_id,
-                event.get('eventType') or event.get('event_type'),
-                event.get('timestamp') or event.get('time'),
-                event.get('time') if isinstance(event.get('time'), str) else event.get('time_human'),
-            ),
+            event.to_row(batch_id) + (batch_id, event.event_type, event.time_ts),
         )
         conn.commit()
     finally:
         conn.close()
 
 
-def upsert_batch_with_events(batch: Dict[str, Any]) -> str:
+def upsert_batch_with_events(batch: Batch) -> str:
     batch_id = upsert_batch(batch)
-    bottling = batch.get('bottling_event')
-    if bottling:
-        insert_batch_event(batch_id, bottling)
+    if batch.bottling_event:
+        insert_batch_event(batch_id, batch.bottling_event)
     return batch_id
 
 
-def fetch_batches(limit: int = 50) -> List[Dict[str, Any]]:
+def fetch_batches(limit: int = 50) -> List[Batch]:
     conn = get_connection()
     try:
         cur = conn.cursor()
@@ -265,13 +456,12 @@ def fetch_batches(limit: int = 50) -> List[Dict[str, Any]]:
             """,
             (limit,),
         )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        return [Batch.from_row(row) for row in cur.fetchall()]
     finally:
         conn.close()
 
 
-def fetch_batches_filtered(limit: int = 50, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+def fetch_batches_filtered(limit: int = 50, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Batch]:
     """Busca lotes do banco e aplica filtro por data (dd/mm/YYYY) em Python.
 
     - start_date/end_date: strings dd/mm/YYYY ou None
@@ -287,9 +477,9 @@ def fetch_batches_filtered(limit: int = 50, start_date: Optional[str] = None, en
             return None
     sd = parse(start_date)
     ed = parse(end_date)
-    filtered: List[Dict[str, Any]] = []
+    filtered: List[Batch] = []
     for r in rows:
-        bd = parse(r.get('brew_date'))
+        bd = parse(r.brew_date)
         if sd and (not bd or bd < sd):
             continue
         if ed and (not bd or bd > ed):
@@ -300,7 +490,7 @@ def fetch_batches_filtered(limit: int = 50, start_date: Optional[str] = None, en
     return filtered
 
 
-def get_batch_by_id(batch_id: str) -> Optional[Dict[str, Any]]:
+def get_batch_by_id(batch_id: str) -> Optional[Batch]:
     conn = get_connection()
     try:
         cur = conn.cursor()
@@ -313,12 +503,12 @@ def get_batch_by_id(batch_id: str) -> Optional[Dict[str, Any]]:
             (batch_id,),
         )
         row = cur.fetchone()
-        return dict(row) if row else None
+        return Batch.from_row(row) if row else None
     finally:
         conn.close()
 
 
-def fetch_batch_events(batch_id: str) -> List[Dict[str, Any]]:
+def fetch_batch_events(batch_id: str) -> List[BatchEvent]:
     conn = get_connection()
     try:
         cur = conn.cursor()
@@ -332,8 +522,7 @@ def fetch_batch_events(batch_id: str) -> List[Dict[str, Any]]:
             """,
             (batch_id,),
         )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        return [BatchEvent.from_row(row) for row in cur.fetchall()]
     finally:
         conn.close()
 
@@ -507,6 +696,8 @@ def list_overridden_batches(limit: int = 100) -> List[Dict[str, Any]]:
         cur.execute(
             """
             SELECT b.id,
+                   b.brewer,
+                   b.recipe_id,
                    b.batch_no,
                    COALESCE(o.name, b.name) AS name,
                    MAX(COALESCE(o.updated_at, h.created_at)) AS updated_at
@@ -525,7 +716,7 @@ def list_overridden_batches(limit: int = 100) -> List[Dict[str, Any]]:
         conn.close()
 
 
-def get_batch_with_overrides(batch_id: str) -> Optional[Dict[str, Any]]:
+def get_batch_with_overrides(batch_id: str) -> Optional[Batch]:
     """Retorna os campos do batch mesclando overrides quando existirem."""
     conn = get_connection()
     try:
@@ -533,6 +724,8 @@ def get_batch_with_overrides(batch_id: str) -> Optional[Dict[str, Any]]:
         cur.execute(
             """
             SELECT b.id,
+                   b.brewer,
+                   b.recipe_id,
                    b.batch_no,
                    COALESCE(o.name, b.name) AS name,
                    COALESCE(o.brew_date, b.brew_date) AS brew_date,
@@ -546,8 +739,340 @@ def get_batch_with_overrides(batch_id: str) -> Optional[Dict[str, Any]]:
             (batch_id,),
         )
         row = cur.fetchone()
+        return Batch.from_row(row) if row else None
+    finally:
+        conn.close()
+
+
+
+
+# ------------------------
+# Fila de impressão
+# ------------------------
+
+def _print_job_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job['payload'] = json.loads(job['payload']) if job.get('payload') else {}
+    job['output_paths'] = json.loads(job['output_paths']) if job.get('output_paths') else []
+    return job
+
+
+def enqueue_print_job(batch_id: Optional[str], payload: Dict[str, Any], priority: int = 0) -> int:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO print_jobs (batch_id, payload, priority)
+            VALUES (?, ?, ?)
+            """,
+            (batch_id, json.dumps(payload, ensure_ascii=False), priority),
+        )
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+def claim_next_print_job() -> Optional[Dict[str, Any]]:
+    """Reserva atomicamente o próximo trabalho pendente (maior prioridade, mais antigo)."""
+    conn = get_connection()
+    conn.isolation_level = None  # transação controlada manualmente
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(
+            """
+            SELECT id FROM print_jobs
+            WHERE status = 'pending'
+            ORDER BY priority DESC, id ASC
+            LIMIT 1
+            """
+        )
+        row = cur.fetchone()
+        if not row:
+            cur.execute("COMMIT")
+            return None
+        cur.execute(
+            """
+            UPDATE print_jobs
+            SET status = 'running', attempts = attempts + 1, started_at = CURRENT_TIMESTAMP, error = NULL
+            WHERE id = ?
+            """,
+            (row['id'],),
+        )
+        cur.execute("SELECT * FROM print_jobs WHERE id = ?", (row['id'],))
+        job = cur.fetchone()
+        cur.execute("COMMIT")
+        return _print_job_from_row(job)
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def complete_print_job(job_id: int, output_paths: List[str], duration: float) -> None:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            UPDATE print_jobs
+            SET status = 'done', output_paths = ?, duration = ?, finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (json.dumps(output_paths, ensure_ascii=False), duration, job_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def fail_print_job(job_id: int, error: str, max_attempts: int = 3) -> None:
+    """Registra a falha; volta para a fila enquanto houver tentativas restantes."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            UPDATE print_jobs
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = ?,
+                finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (max_attempts, error, job_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def requeue_interrupted_print_jobs() -> int:
+    """Devolve para a fila trabalhos que ficaram 'running' (app fechado no meio). Retorna quantos."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE print_jobs SET status = 'pending' WHERE status = 'running'")
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def fetch_print_jobs(limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        if status:
+            cur.execute(
+                "SELECT * FROM print_jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                (status, limit),
+            )
+        else:
+            cur.execute("SELECT * FROM print_jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [_print_job_from_row(row) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_http_cache(endpoint: str) -> Optional[Dict[str, Any]]:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM http_cache WHERE endpoint = ?", (endpoint,))
+        row = cur.fetchone()
         return dict(row) if row else None
     finally:
         conn.close()
 
 
+def put_http_cache(endpoint: str, body: bytes, etag: Optional[str], last_modified: Optional[str], fetched_at: float) -> None:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO http_cache (endpoint, body, etag, last_modified, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(endpoint) DO UPDATE SET
+                body=excluded.body,
+                etag=excluded.etag,
+                last_modified=excluded.last_modified,
+                fetched_at=excluded.fetched_at
+            ;
+            """,
+            (endpoint, body, etag, last_modified, fetched_at),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def touch_http_cache(endpoint: str, fetched_at: float) -> None:
+    """Marca a entrada como revalidada (resposta 304) sem regravar o corpo."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE http_cache SET fetched_at = ? WHERE endpoint = ?", (fetched_at, endpoint))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def upsert_batches_raw(batches: Iterable[Dict[str, Any]]) -> int:
+    """Guarda os documentos completos (JSON comprimido) com o horário de modificação, numa transação."""
+    linhas = []
+    for batch in batches:
+        batch_id = batch.get('_id') or batch.get('id')
+        if not batch_id:
+            raise ValueError('Batch sem _id/id não pode ser persistido')
+        doc = zlib.compress(json.dumps(batch, separators=(',', ':')).encode('utf-8'))
+        linhas.append((batch_id, doc, batch.get('_timemodified')))
+    if not linhas:
+        return 0
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            """
+            INSERT INTO batch_raw (batch_id, doc, time_modified, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(batch_id) DO UPDATE SET
+                doc=excluded.doc,
+                time_modified=excluded.time_modified,
+                updated_at=CURRENT_TIMESTAMP
+            ;
+            """,
+            linhas,
+        )
+        conn.commit()
+        return len(linhas)
+    finally:
+        conn.close()
+
+
+def upsert_batch_raw(batch: Dict[str, Any]) -> str:
+    upsert_batches_raw([batch])
+    return batch.get('_id') or batch.get('id')
+
+
+def get_batch_raw(batch_id: str) -> Optional[Dict[str, Any]]:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT doc FROM batch_raw WHERE batch_id = ?", (batch_id,))
+        row = cur.fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+    finally:
+        conn.close()
+
+
+def iter_batch_raw(batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre todos os documentos arquivados sem carregá-los de uma vez. Cada
+    página é lida (keyset por batch_id) numa conexão fechada antes de ser
+    entregue, para quem consome poder gravar no banco entre uma página e outra.
+    """
+    ultimo = ''
+    while True:
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT batch_id, doc FROM batch_raw WHERE batch_id > ? ORDER BY batch_id LIMIT ?",
+                (ultimo, batch_size),
+            )
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        ultimo = rows[-1][0]
+        for row in rows:
+            yield json.loads(zlib.decompress(row[1]))
+
+
+def get_last_reading_time(batch_id: str) -> Optional[int]:
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(time) FROM batch_readings WHERE batch_id = ?", (batch_id,))
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def insert_readings(batch_id: str, readings: Iterable[Dict[str, Any]]) -> int:
+    """Insere leituras em lote; as já existentes (mesmo horário e aparelho) são ignoradas. Retorna quantas entraram."""
+    linhas = [
+        (batch_id, r['time'], r.get('id') or r.get('type') or '', r.get('sg'), r.get('temp'), r.get('comment'))
+        for r in readings
+        if r.get('time') is not None
+    ]
+    if not linhas:
+        return 0
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            """
+            INSERT OR IGNORE INTO batch_readings (batch_id, time, device, sg, temp, comment)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ;
+            """,
+            linhas,
+        )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def fetch_readings(batch_id: str, since: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Leituras do batch em ordem de tempo; com `since`, só as posteriores a esse timestamp (ms)."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT time, device, sg, temp, comment
+            FROM batch_readings
+            WHERE batch_id = ? AND time > ?
+            ORDER BY time
+            LIMIT ?
+            """,
+            (batch_id, since if since is not None else -1, limit if limit is not None else -1),
+        )
+        return [dict(row) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_readings_summary(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Primeira e última densidade registradas (OG/FG pelas leituras) e o total de pontos."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT
+                COUNT(*) AS total,
+                MIN(time) AS first_time,
+                MAX(time) AS last_time,
+                (SELECT sg FROM batch_readings WHERE batch_id = :b AND sg IS NOT NULL ORDER BY time LIMIT 1) AS first_sg,
+                (SELECT sg FROM batch_readings WHERE batch_id = :b AND sg IS NOT NULL ORDER BY time DESC LIMIT 1) AS last_sg
+            FROM batch_readings
+            WHERE batch_id = :b
+            """,
+            {'b': batch_id},
+        )
+        row = cur.fetchone()
+        return dict(row) if row and row['total'] else None
+    finally:
+        conn.close()
@@ -0,0 +1,98 @@
+import os
+from abc import ABC, abstractmethod
+from itertools import repeat
+from typing import Any, Dict, List, Tuple
+
+from word_handler import (
+    _PLACEHOLDER_RE,
+    REGRAS_FORMATACAO,
+    exigir_etiquetas,
+    montar_dados_etiqueta,
+    nome_arquivo_saida,
+    obter_template,
+    paginar,
+)
+
+
+TAMANHO_PADRAO = 10  # pt
+PADDING = 8  # pt, do topo do slot até a primeira linha
+
+# Texto posicionado na etiqueta: (x, linha de base, tamanho em pt, texto, destaque)
+TextoPosicionado = Tuple[float, float, float, str, bool]
+
+
+def posicionar_textos(x: float, y: float, w: float, dados: Dict[str, Any],
+                      geometria: Dict[str, Any]) -> List[TextoPosicionado]:
+    """Layout de uma etiqueta no slot (x, y, w), em pontos a partir do topo da página.
+
+    Percorre as linhas da tabela modelo (`geometria['linhas_modelo']`), com o
+    tamanho de fonte de `REGRAS_FORMATACAO` e a posição de cada célula pelas
+    larguras das colunas. Linhas de célula única (ex.: nome da receita) saem em
+    destaque, com `x` no centro da etiqueta.
+    """
+    colunas = geometria['colunas_modelo']
+    largura_tabela = sum(colunas) or w
+    x0 = x + (w - largura_tabela) / 2
+    topo = y + PADDING
+    textos = []
+
+    def formatar(texto: str) -> str:
+        texto = _PLACEHOLDER_RE.sub(lambda m: str(dados[m.group(1)]) if m.group(1) in dados else m.group(0), texto)
+        return texto.replace('\n', ' ')
+
+    for linha in geometria['linhas_modelo']:
+        chaves = [c for celula in linha for c in _PLACEHOLDER_RE.findall(celula)]
+        tamanho = next((REGRAS_FORMATACAO[c]['size'].pt for c in chaves
+                        if 'size' in REGRAS_FORMATACAO.get(c, {})), TAMANHO_PADRAO)
+        base = topo + tamanho
+
+        if len(linha) == 1:
+            textos.append((x0 + largura_tabela / 2, base, tamanho, formatar(linha[0]), True))
+        else:
+            cx = x0
+            for n, celula in enumerate(linha):
+                textos.append((cx + 3, base, tamanho, formatar(celula), False))
+                cx += colunas[n] if n < len(colunas) else 0
+        topo += tamanho * 1.5
+    return textos
+
+
+class RenderizadorFolha(ABC):
+    """Base das saídas que desenham a folha a partir de `TemplateCompilado.geometria`.
+
+    As subclasses definem `EXTENSAO` e `escrever(paginas, destino, **opcoes)`;
+    paginação, montagem dos dados e nome do arquivo de saída ficam aqui. Um job
+    sem etiquetas levanta ValueError, como no Word, em vez de gerar arquivo vazio.
+    """
+
+    EXTENSAO = ''
+
+    def __init__(self, template_path: str):
+        self.template_path = template_path
+        self.output_dir = os.path.join(os.path.dirname(template_path), 'output')
+
+    @property
+    def template(self):
+        return obter_template(self.template_path)
+
+    @abstractmethod
+    def escrever(self, paginas, destino, **opcoes) -> None:
+        """Grava as páginas (de `paginar`) em `destino`, caminho ou stream."""
+
+    def _paginas(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None):
+        dados = montar_dados_etiqueta(dados_lote, extra_tags)
+        return exigir_etiquetas(paginar(repeat(dados, quantidade_total), self.template.etiquetas_por_pagina))
+
+    def _paginas_mistas(self, entradas: list, slot_inicial: int = 0):
+        etiquetas = (
+            dados
+            for entrada in entradas
+            for dados in repeat(montar_dados_etiqueta(entrada[0], entrada[2] if len(entrada) > 2 else None), entrada[1])
+        )
+        return exigir_etiquetas(paginar(etiquetas, self.template.etiquetas_por_pagina, slot_inicial))
+
+    def _gravar(self, paginas, prefixo: str, **opcoes) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        caminho_saida = os.path.join(self.output_dir, nome_arquivo_saida(prefixo, self.EXTENSAO))
+        self.escrever(paginas, caminho_saida, **opcoes)
+        return caminho_saida
@@ -1,10 +1,12 @@
 import os
 import threading
+from dataclasses import replace
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
 from api.brewfather_api import BrewfatherAPI
-from word_handler import WordEtiquetaHandler
+from models import Batch
+from print_jobs import FilaImpressaoWorker, enfileirar_impressao
 from db.sqlite_db import (
     init_schema,
     upsert_batch,
@@ -48,6 +50,10 @@ class BrewfatherGUI(tk.Tk):
 
         self._build_ui()
 
+        # Fila persistente de impressão: trabalhos sobrevivem ao fechamento do app
+        self._fila = FilaImpressaoWorker(ao_concluir=self._on_job_concluido)
+        self._fila.start()
+
 
     def _set_window_icon(self):
         """Define o ícone da janela, tentando múltiplas localizações"""
@@ -107,6 +113,11 @@ class BrewfatherGUI(tk.Tk):
         self.btn_salvar_lista = ttk.Button(top, text="Salvar Lista no Banco", command=self._salvar_lista)
         self.btn_salvar_lista.grid(row=0, column=4)
 
+        # Modo offline: usa só o cache local de respostas da API
+        self.offline_var = tk.BooleanVar(value=bool(self.api and self.api.offline))
+        ttk.Checkbutton(top, text="Modo offline", variable=self.offline_var,
+                        command=self._toggle_offline).grid(row=1, column=4, pady=(6,0))
+
         self.btn_template = ttk.Button(top, text="Escolher Modelo...", command=self._escolher_template)
         self.btn_template.grid(row=0, column=5, padx=6)
 
@@ -238,11 +249,21 @@ class BrewfatherGUI(tk.Tk):
             batches = self.api.listBatches(limit)
             self._batches = batches or []
             self._fill_batches_list()
-            self._set_status("Listagem concluída.")
+            self._set_status("Listagem concluída." + self._aviso_cache())
 
         self._run_bg(work)
         self._list_mode = 'api'
 
+    def _toggle_offline(self) -> None:
+        if self.api:
+            self.api.offline = self.offline_var.get()
+        self._set_status("Modo offline ativado (dados do cache local)." if self.offline_var.get() else "Modo online.")
+
+    def _aviso_cache(self) -> str:
+        if self.api and self.api.ultima_resposta_obsoleta:
+            return " (offline: dados em cache, podem estar desatualizados)"
+        return ""
+
     def _listar_lotes_db(self) -> None:
         try:
             limit = int(self.limit_var.get() or "1")
@@ -253,17 +274,7 @@ class BrewfatherGUI(tk.Tk):
 
         def work():
             self._set_status("Carregando lotes do banco...")
-            batches = fetch_batches_filtered(limit=limit, start_date=start, end_date=end)
-            normalized = []
-            for b in batches:
-                normalized.append({
-                    '_id': b.get('id'),
-                    'brewer': b.get('brewer'),
-                    'batchNo': b.get('batch_no'),
-                    'brewDate': b.get('brew_date'),
-                    'recipe_name': b.get('name'),
-                })
-            self._batches = normalized
+            self._batches = fetch_batches_filtered(limit=limit, start_date=start, end_date=end)
             self._fill_batches_list()
             self._set_status("Listagem (DB) concluída.")
 
@@ -273,7 +284,7 @@ class BrewfatherGUI(tk.Tk):
     def _fill_batches_list(self) -> None:
         self.batches_list.delete(0, tk.END)
         for b in self._batches:
-            txt = f"#{b.get('batchNo')} | {b.get('brewDate')} | {b.get('recipe_name') or ''}"
+            txt = f"#{b.batch_no} | {b.brew_date} | {b.name or ''}"
             self.batches_list.insert(tk.END, txt)
         self.details_text.delete("1.0", tk.END)
         self._selected_batch = None
@@ -296,57 +307,43 @@ class BrewfatherGUI(tk.Tk):
 
         def work():
             self._set_status("Buscando detalhes do lote...")
-            details = self.api.listBatch(self._selected_batch['_id'])
+            details = self.api.listBatch(self._selected_batch.id)
             if not details:
                 messagebox.showerror("Erro", "Não foi possível obter detalhes.")
                 self._set_status("Falha ao obter detalhes.")
                 return
             self._show_details(details)
             self._selected_batch = details  # promove a estrutura com detalhes
-            self._set_status("Detalhes obtidos.")
+            self._set_status("Detalhes obtidos." + self._aviso_cache())
 
         self._run_bg(work)
 
-    def _show_details(self, d: dict) -> None:
+    def _show_details(self, d: Batch) -> None:
         # Mescla overrides do banco (se existirem)
-        merged = dict(d)
+        merged = d
         try:
-            ov = get_batch_override(d.get('_id'))
-            if ov:
-                if ov.get('name'):
-                    merged['name'] = ov.get('name')
-                if ov.get('brew_date'):
-                    merged['brewDate'] = ov.get('brew_date')
-                if ov.get('measured_abv'):
-                    merged['measuredAbv'] = ov.get('measured_abv')
-                if ov.get('estimated_ibu'):
-                    merged['estimatedIbu'] = ov.get('estimated_ibu')
-                if ov.get('estimated_color'):
-                    merged['estimatedColor'] = ov.get('estimated_color')
-                #cnsmm
-                #if ov.get('engarrafamento'):
-                #    merged['Engarrafamento'] = ov.get('engarrafamento')                    
+            merged = d.with_overrides(get_batch_override(d.id))
         except Exception:
             pass
 
         self.details_text.delete("1.0", tk.END)
         lines = [
-            f"ID: {merged.get('_id')}",
-            f"Lote: {merged.get('batchNo')}",
-            f"Nome: {merged.get('name')}",
-            f"Brassagem: {merged.get('brewDate')}",
-            f"ABV: {merged.get('measuredAbv')}",
-            f"IBU: {merged.get('estimatedIbu')}",
-            f"Cor: {merged.get('estimatedColor')}",
+            f"ID: {merged.id}",
+            f"Lote: {merged.batch_no}",
+            f"Nome: {merged.name}",
+            f"Brassagem: {merged.brew_date}",
+            f"ABV: {merged.measured_abv}",
+            f"IBU: {merged.estimated_ibu}",
+            f"Cor: {merged.estimated_color}",
             #f"Engarrafamento: {merged.get('engarrafamento')}",
         ]
         #cnsmm
         #if 'Engarrafamento' not in lines:
-        if merged.get('bottling_event'):
-            lines.append(f"Engarrafamento: {merged['bottling_event'].get('time')}")
+        if merged.bottling_event:
+            lines.append(f"Engarrafamento: {merged.bottling_event.time_human}")
         # opcional: mostrar observação se houver override
         try:
-            ov = get_batch_override(merged.get('_id'))
+            ov = get_batch_override(merged.id)
             if ov and ov.get('observation'):
                 lines.append(f"Observação: {ov.get('observation')}")
         except Exception:
@@ -354,7 +351,7 @@ class BrewfatherGUI(tk.Tk):
 
         self.details_text.insert("1.0", "\n".join(lines))
         # Exibir tags atuais
-        self._load_tags_into_list(merged.get('_id'))
+        self._load_tags_into_list(merged.id)
 
     def _salvar_lista(self) -> None:
         if not self._batches:
@@ -364,15 +361,8 @@ class BrewfatherGUI(tk.Tk):
         def work():
             ok = 0
             for b in self._batches:
-                payload = {
-                    '_id': b.get('_id'),
-                    'batchNo': b.get('batchNo'),
-                    'brewer': b.get('brewer'),
-                    'brewDate': b.get('brewDate'),
-                    'name': b.get('recipe_name'),
-                }
                 try:
-                    upsert_batch(payload)
+                    upsert_batch(b)
                     ok += 1
                 except Exception:
                     pass
@@ -382,15 +372,15 @@ class BrewfatherGUI(tk.Tk):
         self._run_bg(work)
 
     def _salvar_detalhes(self) -> None:
-        if not self._selected_batch or not self._selected_batch.get('_id'):
+        if not self._selected_batch or not self._selected_batch.id:
             messagebox.showinfo("Info", "Busque os detalhes do lote primeiro.")
             return
 
         # Captura dados da UI no thread principal
         text = self.details_text.get("1.0", tk.END).strip()
         obs = tk.simpledialog.askstring("Observação", "Deseja incluir alguma observação?")
-        batch_id = self._selected_batch['_id']
-        selected_batch_copy = dict(self._selected_batch)
+        batch_id = self._selected_batch.id
+        selected_batch_copy = replace(self._selected_batch)
 
         def work():
             try:
@@ -451,7 +441,7 @@ class BrewfatherGUI(tk.Tk):
         self._set_status(f"Modelo: {path}")
 
     def _gerar_etiquetas(self) -> None:
-        if not self._selected_batch or not self._selected_batch.get('_id'):
+        if not self._selected_batch or not self._selected_batch.id:
             messagebox.showinfo("Info", "Busque os detalhes do lote primeiro.")
             return
         try:
@@ -459,6 +449,9 @@ class BrewfatherGUI(tk.Tk):
         except ValueError:
             messagebox.showerror("Erro", "Quantidade inválida.")
             return
+        if qtd <= 0:
+            messagebox.showerror("Erro", "A quantidade deve ser maior que zero.")
+            return
 
         path = self._template_path or get_template_path_from_settings()
         if not os.path.exists(path):
@@ -467,39 +460,35 @@ class BrewfatherGUI(tk.Tk):
 
         def work():
             try:
-                handler = WordEtiquetaHandler(path)
                 # Carrega overrides e tags
-                ov = get_batch_override(self._selected_batch['_id']) or {}
-                tags = {t['tag_key']: t['tag_value'] for t in list_tags(self._selected_batch['_id'])}
+                ov = get_batch_override(self._selected_batch.id) or {}
+                tags = {t['tag_key']: t['tag_value'] for t in list_tags(self._selected_batch.id)}
                 # Mescla overrides nos dados
-                dados = dict(self._selected_batch)
-                if ov:
-                    if ov.get('name'):
-                        dados['name'] = ov.get('name')
-                    if ov.get('brew_date'):
-                        dados['brewDate'] = ov.get('brew_date')
-                    if ov.get('measured_abv'):
-                        dados['measuredAbv'] = ov.get('measured_abv')
-                    if ov.get('estimated_ibu'):
-                        dados['estimatedIbu'] = ov.get('estimated_ibu')
-                    if ov.get('estimated_color'):
-                        dados['estimatedColor'] = ov.get('estimated_color')
-                    if ov.get('observation'):
-                        tags.setdefault('observacao', ov.get('observation'))
-
-                arquivos = handler.criar_multiplas_paginas(dados, qtd, extra_tags=tags)
-                msg = "\n".join(os.path.basename(a) for a in arquivos)
-                self.after(0, lambda: (self._set_status("Etiquetas geradas."), messagebox.showinfo("Sucesso", f"Arquivos gerados:\n{msg}")))
+                dados = self._selected_batch.with_overrides(ov).to_dict()
+                if ov.get('observation'):
+                    tags.setdefault('observacao', ov.get('observation'))
+
+                job_id = enfileirar_impressao(path, dados, qtd, extra_tags=tags)
+                self._fila.notificar()
+                self.after(0, lambda: self._set_status(f"Trabalho de impressão #{job_id} na fila..."))
             except Exception as e:
-                self.after(0, lambda: messagebox.showerror("Erro", f"Falha ao gerar: {e}"))
+                self.after(0, lambda: messagebox.showerror("Erro", f"Falha ao enfileirar: {e}"))
           
         #Executa via theading para não travar a UI
-        self._set_status("Gerando etiquetas...")
+        self._set_status("Enfileirando etiquetas...")
         self._run_bg(work)    
+
+    def _on_job_concluido(self, job: dict, arquivos: list, erro) -> None:
+        """Chamado pela thread da fila; repassa o resultado para a thread da UI."""
+        if erro:
+            self.after(0, lambda: messagebox.showerror("Erro", f"Falha ao gerar (trabalho #{job['id']}): {erro}"))
+            return
+        msg = "\n".join(os.path.basename(a) for a in arquivos)
+        self.after(0, lambda: (self._set_status("Etiquetas geradas."), messagebox.showinfo("Sucesso", f"Arquivos gerados:\n{msg}")))
                 
                 
     def _add_or_update_tag(self) -> None:
-        if not self._selected_batch or not self._selected_batch.get('_id'):
+        if not self._selected_batch or not self._selected_batch.id:
             messagebox.showinfo("Info", "Busque os detalhes do lote primeiro.")
             return
         key = (self.tag_key_var.get() or '').strip()
@@ -508,14 +497,14 @@ class BrewfatherGUI(tk.Tk):
             return
         val = (self.tag_value_var.get() or '').strip()
         try:
-            set_tag(self._selected_batch['_id'], key, val)
-            self._load_tags_into_list(self._selected_batch['_id'])
+            set_tag(self._selected_batch.id, key, val)
+            self._load_tags_into_list(self._selected_batch.id)
             self._set_status("Tag salva.")
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao salvar tag: {e}")
 
     def _remove_selected_tag(self) -> None:
-        if not self._selected_batch or not self._selected_batch.get('_id'):
+        if not self._selected_batch or not self._selected_batch.id:
             return
         sel = self.tags_list.curselection()
         if not sel:
@@ -524,8 +513,8 @@ class BrewfatherGUI(tk.Tk):
         if "=" in line:
             key = line.split("=", 1)[0].strip()
             try:
-                delete_tag(self._selected_batch['_id'], key)
-                self._load_tags_into_list(self._selected_batch['_id'])
+                delete_tag(self._selected_batch.id, key)
+                self._load_tags_into_list(self._selected_batch.id)
                 self._set_status("Tag removida.")
             except Exception as e:
                 messagebox.showerror("Erro", f"Falha ao remover tag: {e}")
@@ -565,18 +554,9 @@ class BrewfatherGUI(tk.Tk):
             row = self._saved_rows[idx]
         except Exception:
             return
-        b = get_batch_with_overrides(row['id']) or get_batch_by_id(row['id'])
-        if not b:
+        details = get_batch_with_overrides(row['id']) or get_batch_by_id(row['id'])
+        if not details:
             return
-        details = {
-            '_id': b.get('id'),
-            'batchNo': b.get('batch_no'),
-            'name': b.get('name'),
-            'brewDate': b.get('brew_date'),
-            'measuredAbv': b.get('measured_abv'),
-            'estimatedIbu': b.get('estimated_ibu'),
-            'estimatedColor': b.get('estimated_color'),
-        }
         self._show_details(details)
         self._selected_batch = details
 
@@ -620,7 +600,7 @@ class BrewfatherGUI(tk.Tk):
 
         ttk.Label(win, text="Modo de início:").grid(row=3, column=0, sticky="w", **pad)
         mode_var = tk.StringVar(value=env.get('START_MODE', 'ask'))
-        mode_combo = ttk.Combobox(win, textvariable=mode_var, values=['ask', 'cli', 'gui'], state='readonly', width=10)
+        mode_combo = ttk.Combobox(win, textvariable=mode_var, values=['ask', 'cli', 'gui', 'server'], state='readonly', width=10)
         mode_combo.grid(row=3, column=1, sticky="w", **pad)
 
         win.columnconfigure(1, weight=1)
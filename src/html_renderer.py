@@ -0,0 +1,82 @@
+from html import escape
+from io import StringIO
+from typing import Any, Dict, Iterable
+
+from folha_etiquetas import RenderizadorFolha, posicionar_textos
+
+
+_CABECALHO = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+<style>
+@page {{ size: {largura:.2f}pt {altura:.2f}pt; margin: 0; }}
+body {{ margin: 0; }}
+svg.folha {{ display: block; page-break-after: always; break-after: page; font-family: Arial, Helvetica, sans-serif; }}
+svg.folha:last-child {{ page-break-after: auto; break-after: auto; }}
+.receita {{ font-weight: bold; }}
+</style>
+</head>
+<body>
+"""
+
+_RODAPE = "</body>\n</html>\n"
+
+
+class HtmlEtiquetaHandler(RenderizadorFolha):
+    """Gera a folha de etiquetas como um HTML autocontido (uma <svg> por página).
+
+    É só montagem de strings, então custa quase nada perto do python-docx, e
+    qualquer navegador consegue imprimir. A grade vem da geometria do template
+    .docx (`TemplateCompilado.geometria`) e as páginas são escritas uma a uma no
+    destino, sem montar o documento inteiro em memória.
+    """
+
+    EXTENSAO = 'html'
+
+    def _etiqueta_svg(self, x: float, y: float, w: float, dados: Dict[str, Any], geometria: Dict[str, Any]) -> str:
+        partes = []
+        for tx, base, tamanho, texto, destaque in posicionar_textos(x, y, w, dados, geometria):
+            if destaque:
+                partes.append(
+                    f'<text class="receita" x="{tx:.2f}" y="{base:.2f}" '
+                    f'font-size="{tamanho:g}" text-anchor="middle">{escape(texto)}</text>'
+                )
+            else:
+                partes.append(f'<text x="{tx:.2f}" y="{base:.2f}" font-size="{tamanho:g}">{escape(texto)}</text>')
+        return '<g>' + ''.join(partes) + '</g>\n'
+
+    def escrever(self, paginas: Iterable[list], destino, titulo: str = 'Etiquetas') -> None:
+        """Escreve o HTML em `destino` (caminho ou stream de texto), página a página."""
+        if isinstance(destino, str):
+            with open(destino, 'w', encoding='utf-8') as f:
+                return self.escrever(paginas, f, titulo)
+
+        geometria = self.template.geometria
+        largura, altura = geometria['pagina']
+        destino.write(_CABECALHO.format(titulo=escape(titulo), largura=largura, altura=altura))
+        for pagina in paginas:
+            destino.write(
+                f'<svg class="folha" xmlns="http://www.w3.org/2000/svg" width="{largura:.2f}pt" height="{altura:.2f}pt" '
+                f'viewBox="0 0 {largura:.2f} {altura:.2f}">\n'
+            )
+            for (x, y, w, _), dados in zip(geometria['slots'], pagina):
+                if dados is not None:
+                    destino.write(self._etiqueta_svg(x, y, w, dados, geometria))
+            destino.write('</svg>\n')
+        destino.write(_RODAPE)
+
+    def criar_html(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None) -> str:
+        """Cria um HTML com todas as etiquetas do lote e retorna o caminho."""
+        return self._gravar(self._paginas(dados_lote, quantidade_total, extra_tags), f"etiqueta_{dados_lote['batchNo']}",
+                            titulo=f"Lote {dados_lote['batchNo']}")
+
+    def criar_html_misto(self, entradas: list, slot_inicial: int = 0) -> str:
+        """Como `WordEtiquetaHandler.criar_etiquetas_mistas`, mas em HTML."""
+        return self._gravar(self._paginas_mistas(entradas, slot_inicial), 'etiqueta_misto')
+
+    def renderizar_texto(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None) -> str:
+        buffer = StringIO()
+        self.escrever(self._paginas(dados_lote, quantidade_total, extra_tags), buffer, titulo=f"Lote {dados_lote['batchNo']}")
+        return buffer.getvalue()
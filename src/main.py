@@ -1,14 +1,16 @@
 import sys
 import os
+import multiprocessing
 
 # Adiciona o diretório src ao path do Python
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from api.brewfather_api import BrewfatherAPI
 from word_handler import WordEtiquetaHandler
-from db.sqlite_db import init_schema, upsert_batch, upsert_batch_with_events
+from db.sqlite_db import init_schema, upsert_batch_with_events
 from settings import get_template_path_from_settings, prompt_for_template_path, save_template_as_default, get_start_mode
 from gui.app import run_gui
+from sync import salvar_lista_lotes
 
 def clear_screen():
     """Limpa a tela do terminal"""
@@ -21,11 +23,11 @@ def display_batches_list(batches):
     print("="*80)
     
     for i, batch in enumerate(batches, 1):
-        print(f"{i}. Lote #{batch.get('batchNo', 'N/A')}")
-        print(f"   Data: {batch.get('brewDate', 'N/A')}")
-        print(f"   Receita: {batch.get('recipe_name', 'N/A')}")
-        print(f"   Brewer: {batch.get('brewer', 'N/A')}")
-        print(f"   ID: {batch.get('_id')}")
+        print(f"{i}. Lote #{batch.batch_no or 'N/A'}")
+        print(f"   Data: {batch.brew_date or 'N/A'}")
+        print(f"   Receita: {batch.name or 'N/A'}")
+        print(f"   Brewer: {batch.brewer or 'N/A'}")
+        print(f"   ID: {batch.id}")
         print("-" * 80)
 
 def display_batch_details(batch_details):
@@ -34,16 +36,16 @@ def display_batch_details(batch_details):
     print("DETALHES COMPLETOS DO LOTE")
     print("="*80)
     
-    print(f"Identificador Único: {batch_details['_id']}")
-    print(f"Número do Lote: {batch_details['batchNo']}")
-    print(f"Nome: {batch_details['name']}")
-    print(f"Data de Brassagem: {batch_details['brewDate']}")
-    print(f"ABV Medido: {batch_details['measuredAbv']}%")
-    print(f"IBU Estimado: {batch_details['estimatedIbu']}")
-    print(f"Cor Estimada: {batch_details['estimatedColor']} EBC")
+    print(f"Identificador Único: {batch_details.id}")
+    print(f"Número do Lote: {batch_details.batch_no}")
+    print(f"Nome: {batch_details.name}")
+    print(f"Data de Brassagem: {batch_details.brew_date}")
+    print(f"ABV Medido: {batch_details.measured_abv}%")
+    print(f"IBU Estimado: {batch_details.estimated_ibu}")
+    print(f"Cor Estimada: {batch_details.estimated_color} EBC")
     
-    if batch_details.get('bottling_event'):
-        print(f"Data de Engarrafamento: {batch_details['bottling_event']['time']}")
+    if batch_details.bottling_event:
+        print(f"Data de Engarrafamento: {batch_details.bottling_event.time_human}")
     else:
         print("Data de Engarrafamento: Não encontrada")
     
@@ -70,12 +72,12 @@ def gerar_etiquetas(batch_details):
             return
 
         # Inicializar handler de Word
-        word_handler = WordEtiquetaHandler(template_path)
+        word_handler = WordEtiquetaHandler(template_path, usar_cache=True)
         
         print("🖨️  Gerando etiquetas...")
         
         # Gerar etiquetas
-        arquivos_gerados = word_handler.criar_multiplas_paginas(batch_details, quantidade)
+        arquivos_gerados = word_handler.criar_multiplas_paginas(batch_details.to_dict(), quantidade, documento_unico=True)
         
         print(f"✅ Etiquetas geradas com sucesso!")
         for arquivo in arquivos_gerados:
@@ -90,26 +92,7 @@ def gerar_etiquetas(batch_details):
 
 def salvar_lotes_no_banco(batches):
     """Salva/atualiza lotes (visão de lista) no SQLite."""
-    salvos = 0
-    for b in batches:
-        # Converte estrutura da lista para o formato esperado pelo upsert
-        payload = {
-            '_id': b.get('_id'),
-            'batchNo': b.get('batchNo'),
-            'brewer': b.get('brewer'),
-            'brewDate': b.get('brewDate'),
-            'name': b.get('recipe_name'),
-            # Campos não disponíveis na listagem ficam como None
-            'measuredAbv': None,
-            'estimatedIbu': None,
-            'estimatedColor': None,
-            'recipe': None,
-        }
-        try:
-            upsert_batch(payload)
-            salvos += 1
-        except Exception as e:
-            print(f"⚠️  Falha ao salvar lote {b.get('_id')}: {e}")
+    salvos = salvar_lista_lotes(batches)
     print(f"💾 {salvos} lote(s) salvos/atualizados no banco.")
 
 def salvar_detalhes_no_banco(batch_details):
@@ -120,6 +103,21 @@ def salvar_detalhes_no_banco(batch_details):
     except Exception as e:
         print(f"⚠️  Falha ao salvar detalhes do lote: {e}")
 
+def salvar_varios_detalhes_no_banco(brewfather, ids):
+    """Busca os detalhes de vários lotes em paralelo e salva cada um com seus eventos."""
+    print(f"🔍 Buscando detalhes de {len(ids)} lote(s)...")
+    salvos = 0
+    for item in brewfather.listBatches_details(ids):
+        if item['batch'] is None:
+            print(f"⚠️  Falha no lote {item['_id']}: {item['erro']}")
+            continue
+        try:
+            upsert_batch_with_events(item['batch'])
+            salvos += 1
+        except Exception as e:
+            print(f"⚠️  Falha ao salvar lote {item['_id']}: {e}")
+    print(f"💾 {salvos} lote(s) salvos/atualizados no banco com eventos (se houver).")
+
 def main():
     # Seletor de modo com .env
     start_mode = get_start_mode()
@@ -128,12 +126,19 @@ def main():
         modo = '2'
     elif start_mode == 'cli':
         modo = '1'
+    elif start_mode == 'server':
+        modo = '3'
     else:
         print("Selecione o modo de execução:")
         print("1 - Terminal (CLI)")
         print("2 - Interface Gráfica (GUI)")
+        print("3 - Servidor HTTP de etiquetas")
         modo = input("Escolha (Enter = 1): ").strip()
 
+    if modo == '3':
+        from server import run_server
+        return run_server()
+
     if modo == '2':
         try:
             init_schema()
@@ -195,11 +200,13 @@ def main():
         # Mostrar lista de lotes
         display_batches_list(batches)
 
-        # Oferecer salvar a lista no banco
+        # Oferecer salvar a lista no banco (d = com detalhes de todos os lotes)
         try:
-            salvar_lista = input("\n💾 Deseja salvar estes lotes no banco? (s/n): ").strip().lower()
+            salvar_lista = input("\n💾 Deseja salvar estes lotes no banco? (s/n/d = com detalhes): ").strip().lower()
             if salvar_lista in ['s', 'sim', 'y', 'yes']:
                 salvar_lotes_no_banco(batches)
+            elif salvar_lista == 'd':
+                salvar_varios_detalhes_no_banco(brewfather, [b.id for b in batches if b.id])
         except Exception as e:
             print(f"⚠️  Erro ao salvar lotes: {e}")
         
@@ -214,10 +221,10 @@ def main():
             
             if 0 <= choice_index < len(batches):
                 selected_batch = batches[choice_index]
-                print(f"\n🔍 Buscando detalhes do lote #{selected_batch['batchNo']}...")
+                print(f"\n🔍 Buscando detalhes do lote #{selected_batch.batch_no}...")
                 
                 # Obter detalhes do lote selecionado
-                batch_details = brewfather.listBatch(selected_batch['_id'])
+                batch_details = brewfather.listBatch(selected_batch.id)
                 
                 if batch_details:
                     display_batch_details(batch_details)
@@ -254,4 +261,6 @@ def main():
         input("Pressione Enter para continuar...")
 
 if __name__ == "__main__":
+    # Necessário para o ProcessPoolExecutor no executável congelado (PyInstaller/Windows)
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
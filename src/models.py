@@ -0,0 +1,129 @@
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+
+BOTTLING_EVENT = 'event-batch-bottling-day'
+
+# Campos de batch_overrides que substituem os do lote na impressão
+_CAMPOS_OVERRIDE = ('name', 'brew_date', 'measured_abv', 'estimated_ibu', 'estimated_color')
+
+# Colunas da tabela batches, na ordem dos campos de Batch
+_COLUNAS = ('id', 'batch_no', 'brewer', 'brew_date', 'name',
+            'measured_abv', 'estimated_ibu', 'estimated_color', 'recipe_id')
+
+
+def _data_ms(valor: Any, formato: str) -> Optional[str]:
+    try:
+        return datetime.fromtimestamp(valor / 1000).strftime(formato)
+    except (ValueError, TypeError, OSError):
+        return None
+
+
+@dataclass(slots=True)
+class BatchEvent:
+    """Evento de um lote (hoje só o de engarrafamento é usado nas etiquetas)."""
+
+    event_type: Optional[str]
+    time_ts: Optional[int] = None
+    time_human: Optional[str] = None  # dd/mm/aaaa HH:MM:SS
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> 'BatchEvent':
+        return cls(row['event_type'], row['time_ts'], row['time_human'])
+
+    def to_row(self, batch_id: str) -> tuple:
+        return (batch_id, self.event_type, self.time_ts, self.time_human)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'eventType': self.event_type, 'time': self.time_human, 'timestamp': self.time_ts}
+
+
+@dataclass(slots=True)
+class Batch:
+    """
+    Lote na forma usada por API, banco, GUI e CLI. Os campos seguem as colunas
+    da tabela batches; `to_dict()` devolve o formato (camelCase) esperado pela
+    geração de etiquetas e pela fila de impressão.
+    """
+
+    id: str
+    batch_no: Optional[int] = None
+    brewer: Optional[str] = None
+    brew_date: Optional[str] = None  # dd/mm/aaaa
+    name: Optional[str] = None
+    measured_abv: Any = None
+    estimated_ibu: Any = None
+    estimated_color: Any = None
+    recipe_id: Optional[str] = None
+    time_modified: Optional[int] = None
+    bottling_event: Optional[BatchEvent] = None
+
+    @classmethod
+    def from_api(cls, batch_data: Mapping[str, Any]) -> 'Batch':
+        """
+        Monta o lote a partir do JSON da API: serve para a listagem (projeção)
+        e para o documento completo, inclusive o guardado em batch_raw. A data
+        de envase vem da nota 'Conditioning' ou, sem ela, do evento de
+        engarrafamento.
+        """
+        bottling_event = None
+        for event in batch_data.get('events') or []:
+            if event.get('eventType') == BOTTLING_EVENT:
+                bottling_event = event
+                break
+
+        evento = None
+        if bottling_event:
+            data_envase = next((note.get('timestamp') for note in batch_data.get('notes') or []
+                                if note.get('status') == 'Conditioning'), None)
+            if data_envase is None:
+                data_envase = bottling_event.get('time')
+            evento = BatchEvent(BOTTLING_EVENT, bottling_event.get('time'),
+                                _data_ms(data_envase, '%d/%m/%Y %H:%M:%S'))
+
+        recipe = batch_data.get('recipe') or {}
+        return cls(
+            id=batch_data.get('_id'),
+            batch_no=batch_data.get('batchNo'),
+            brewer=batch_data.get('brewer'),
+            brew_date=_data_ms(batch_data.get('brewDate'), '%d/%m/%Y') if batch_data.get('brewDate') else None,
+            name=recipe.get('name'),
+            measured_abv=batch_data.get('measuredAbv'),
+            estimated_ibu=batch_data.get('estimatedIbu'),
+            estimated_color=batch_data.get('estimatedColor'),
+            recipe_id=recipe.get('_id'),
+            time_modified=batch_data.get('_timemodified'),
+            bottling_event=evento,
+        )
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> 'Batch':
+        """A partir de uma linha de batches (sqlite3.Row ou dict); colunas ausentes ficam None."""
+        colunas = row.keys()
+        return cls(*(row[c] if c in colunas else None for c in _COLUNAS))
+
+    def to_row(self) -> tuple:
+        """Valores na ordem de `_COLUNAS`, para INSERT/UPSERT em batches."""
+        return (self.id, self.batch_no, self.brewer, self.brew_date, self.name,
+                self.measured_abv, self.estimated_ibu, self.estimated_color, self.recipe_id)
+
+    def with_overrides(self, overrides: Optional[Mapping[str, Any]]) -> 'Batch':
+        """Cópia com as edições manuais (batch_overrides) aplicadas onde preenchidas."""
+        if not overrides:
+            return self
+        return replace(self, **{c: overrides[c] for c in _CAMPOS_OVERRIDE if overrides.get(c)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            '_id': self.id,
+            'batchNo': self.batch_no,
+            'brewer': self.brewer,
+            'brewDate': self.brew_date,
+            'name': self.name,
+            'measuredAbv': self.measured_abv,
+            'estimatedIbu': self.estimated_ibu,
+            'estimatedColor': self.estimated_color,
+            'recipe_id': self.recipe_id,
+            'bottling_event': self.bottling_event.to_dict() if self.bottling_event else None,
+        }
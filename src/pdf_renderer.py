@@ -0,0 +1,126 @@
+import zlib
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from folha_etiquetas import RenderizadorFolha, posicionar_textos
+
+
+def _texto_pdf(texto: str) -> bytes:
+    """String literal PDF (WinAnsi/cp1252) com os caracteres especiais escapados."""
+    dados = texto.encode('cp1252', errors='replace')
+    return b'(' + dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _largura_aprox(texto: str, tamanho: float) -> float:
+    # Largura média da Helvetica (~0.5 em); suficiente para centralizar
+    return len(texto) * tamanho * 0.5
+
+
+class _EscritorPdf:
+    """Escreve um PDF objeto a objeto em um stream, guardando só os offsets (xref)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.offsets: Dict[int, int] = {}
+        self.proximo_id = 1
+        self.posicao = 0
+        self._escrever(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _escrever(self, dados: bytes) -> None:
+        self.stream.write(dados)
+        self.posicao += len(dados)
+
+    def reservar(self) -> int:
+        obj_id = self.proximo_id
+        self.proximo_id += 1
+        return obj_id
+
+    def objeto(self, conteudo: bytes, obj_id: Optional[int] = None) -> int:
+        obj_id = obj_id or self.reservar()
+        self.offsets[obj_id] = self.posicao
+        self._escrever(f'{obj_id} 0 obj\n'.encode() + conteudo + b'\nendobj\n')
+        return obj_id
+
+    def stream_obj(self, dados: bytes) -> int:
+        comprimido = zlib.compress(dados)
+        cabecalho = f'<< /Length {len(comprimido)} /Filter /FlateDecode >>\nstream\n'.encode()
+        return self.objeto(cabecalho + comprimido + b'\nendstream')
+
+    def fechar(self, raiz_id: int) -> None:
+        inicio_xref = self.posicao
+        total = self.proximo_id
+        linhas = [f'xref\n0 {total}\n', '0000000000 65535 f \n']
+        for obj_id in range(1, total):
+            linhas.append(f'{self.offsets[obj_id]:010d} 00000 n \n')
+        linhas.append(f'trailer\n<< /Size {total} /Root {raiz_id} 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n')
+        self._escrever(''.join(linhas).encode())
+
+
+class PdfEtiquetaHandler(RenderizadorFolha):
+    """Gera a folha de etiquetas diretamente em PDF vetorial, sem Word/LibreOffice.
+
+    A grade (tamanho da página, posição de cada slot, colunas da tabela modelo e
+    o texto de cada linha) vem da geometria do template .docx
+    (`TemplateCompilado.geometria`); os placeholders são os mesmos de
+    `criar_etiquetas`. Um job inteiro vira um único PDF.
+    """
+
+    EXTENSAO = 'pdf'
+
+    def _desenhar_etiqueta(self, x: float, y: float, w: float, altura_pagina: float,
+                           dados: Dict[str, Any], geometria: Dict[str, Any]) -> List[str]:
+        ops = []
+        for tx, base, tamanho, texto, destaque in posicionar_textos(x, y, w, dados, geometria):
+            fonte = 'F1'
+            if destaque:
+                # Célula única (ex.: nome da receita): centralizada e em negrito
+                fonte, tx = 'F2', tx - _largura_aprox(texto, tamanho) / 2
+            ops.append(f'BT /{fonte} {tamanho:.2f} Tf {tx:.2f} {altura_pagina - base:.2f} Td ')
+            ops.append(_texto_pdf(texto).decode('latin-1') + ' Tj ET')
+        return ops
+
+    def escrever(self, paginas, destino) -> None:
+        """Grava o PDF em `destino` (caminho ou stream binário), uma página por folha."""
+        geometria = self.template.geometria
+        largura, altura = geometria['pagina']
+
+        if isinstance(destino, str):
+            with open(destino, 'wb') as f:
+                return self.escrever(paginas, f)
+
+        pdf = _EscritorPdf(destino)
+        catalogo_id = pdf.reservar()
+        paginas_id = pdf.reservar()
+        fonte = pdf.objeto(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        fonte_negrito = pdf.objeto(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        recursos = f'<< /Font << /F1 {fonte} 0 R /F2 {fonte_negrito} 0 R >> >>'
+
+        filhos = []
+        for pagina in paginas:
+            ops = []
+            for (x, y, w, _), dados in zip(geometria['slots'], pagina):
+                if dados is not None:
+                    ops.extend(self._desenhar_etiqueta(x, y, w, altura, dados, geometria))
+            conteudo = pdf.stream_obj('\n'.join(ops).encode('latin-1'))
+            filhos.append(pdf.objeto(
+                f'<< /Type /Page /Parent {paginas_id} 0 R /MediaBox [0 0 {largura:.2f} {altura:.2f}] '
+                f'/Resources {recursos} /Contents {conteudo} 0 R >>'.encode()
+            ))
+
+        kids = ' '.join(f'{i} 0 R' for i in filhos)
+        pdf.objeto(f'<< /Type /Pages /Kids [{kids}] /Count {len(filhos)} >>'.encode(), paginas_id)
+        pdf.objeto(f'<< /Type /Catalog /Pages {paginas_id} 0 R >>'.encode(), catalogo_id)
+        pdf.fechar(catalogo_id)
+
+    def criar_pdf(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None) -> str:
+        """Cria um PDF com todas as etiquetas do lote e retorna o caminho."""
+        return self._gravar(self._paginas(dados_lote, quantidade_total, extra_tags), f"etiqueta_{dados_lote['batchNo']}")
+
+    def criar_pdf_misto(self, entradas: list, slot_inicial: int = 0) -> str:
+        """Como `WordEtiquetaHandler.criar_etiquetas_mistas`, mas em PDF."""
+        return self._gravar(self._paginas_mistas(entradas, slot_inicial), 'etiqueta_misto')
+
+    def renderizar_bytes(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None) -> bytes:
+        buffer = BytesIO()
+        self.escrever(self._paginas(dados_lote, quantidade_total, extra_tags), buffer)
+        return buffer.getvalue()
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db.sqlite_db import (
+    enqueue_print_job,
+    claim_next_print_job,
+    complete_print_job,
+    fail_print_job,
+    requeue_interrupted_print_jobs,
+)
+from word_handler import WordEtiquetaHandler, obter_template, registrar_template
+
+
+# Entrada de um job de impressão: (dados do lote, quantidade, tags extras)
+EntradaJob = Tuple[Dict[str, Any], int, Optional[Dict[str, Any]]]
+
+# Erros que se repetiriam em toda tentativa (dados/quantidade inválidos, modelo ausente):
+# o trabalho vai direto para 'failed'
+ERROS_PERMANENTES = (ValueError, KeyError, TypeError, FileNotFoundError)
+
+
+def _inicializar_worker(template_path: str, conteudo: bytes, mtime_ns: int, tamanho: int) -> None:
+    """Roda uma vez em cada processo: compila o template a partir dos bytes recebidos."""
+    registrar_template(template_path, conteudo, mtime_ns, tamanho)
+
+
+def _renderizar_job(template_path: str, dados_lote: Dict[str, Any], quantidade: int,
+                    extra_tags: Optional[Dict[str, Any]], rapido: bool) -> Tuple[List[str], float]:
+    inicio = time.perf_counter()
+    handler = WordEtiquetaHandler(template_path)
+    arquivos = handler.criar_multiplas_paginas(
+        dados_lote, quantidade, extra_tags=extra_tags, documento_unico=True, rapido=rapido
+    )
+    return arquivos, time.perf_counter() - inicio
+
+
+def renderizar_bytes_job(template_path: str, dados_lote: Dict[str, Any], quantidade: int,
+                         extra_tags: Optional[Dict[str, Any]] = None, rapido: bool = True) -> bytes:
+    """Renderiza um lote em memória (documento único). Pode rodar dentro do pool."""
+    handler = WordEtiquetaHandler(template_path)
+    return handler.renderizar_bytes(dados_lote, quantidade, extra_tags=extra_tags, rapido=rapido)
+
+
+def criar_pool(template_path: str, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Cria um pool de processos com o template já compilado em cada worker."""
+    max_workers = max_workers or os.cpu_count() or 1
+    if not os.path.exists(template_path):
+        # Sem template ainda: cada worker carrega do disco na primeira renderização
+        return ProcessPoolExecutor(max_workers=max_workers)
+    template = obter_template(template_path)
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_inicializar_worker,
+        initargs=(template_path, template.conteudo, template.mtime_ns, template.tamanho),
+    )
+
+
+def gerar_etiquetas_lotes(template_path: str, entradas: Sequence[EntradaJob],
+                          max_workers: Optional[int] = None, rapido: bool = True) -> List[Dict[str, Any]]:
+    """Gera as etiquetas de vários lotes em paralelo (um processo por núcleo).
+
+    - entradas: lista de (dados_lote, quantidade, extra_tags)
+    - retorna, na mesma ordem das entradas, dicts com batchNo, quantidade,
+      arquivos gerados e duração (segundos) de cada job
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(entradas)) or 1
+
+    if max_workers == 1:
+        resultados = [_renderizar_job(template_path, d, q, t, rapido) for d, q, t in entradas]
+    else:
+        with criar_pool(template_path, max_workers) as pool:
+            futuros = [pool.submit(_renderizar_job, template_path, d, q, t, rapido) for d, q, t in entradas]
+            resultados = [f.result() for f in futuros]
+
+    jobs = []
+    for (dados_lote, quantidade, _), (arquivos, duracao) in zip(entradas, resultados):
+        jobs.append({
+            'batchNo': dados_lote.get('batchNo'),
+            'quantidade': quantidade,
+            'arquivos': arquivos,
+            'duracao': duracao,
+        })
+    return jobs
+
+
+# ------------------------
+# Fila persistente (SQLite) + worker em segundo plano
+# ------------------------
+
+def enfileirar_impressao(template_path: str, dados_lote: Dict[str, Any], quantidade: int,
+                         extra_tags: Optional[Dict[str, Any]] = None, prioridade: int = 0) -> int:
+    """Grava um trabalho de impressão na tabela print_jobs e retorna seu id."""
+    payload = {
+        'template_path': template_path,
+        'dados_lote': dados_lote,
+        'quantidade': quantidade,
+        'extra_tags': extra_tags or {},
+    }
+    return enqueue_print_job(dados_lote.get('_id'), payload, prioridade)
+
+
+class FilaImpressaoWorker(threading.Thread):
+    """Consome a fila print_jobs: reserva um trabalho por vez e renderiza via WordEtiquetaHandler.
+
+    Ao iniciar, trabalhos interrompidos ('running') voltam para a fila.
+    `ao_concluir(job, arquivos, erro)` é chamado (nesta thread) ao fim de cada trabalho.
+    """
+
+    def __init__(self, ao_concluir=None, intervalo: float = 2.0, max_tentativas: int = 3):
+        super().__init__(daemon=True)
+        self.ao_concluir = ao_concluir
+        self.intervalo = intervalo
+        self.max_tentativas = max_tentativas
+        self.retomados = 0
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+
+    def notificar(self) -> None:
+        """Acorda o worker imediatamente (ex.: logo após enfileirar)."""
+        self._acordar.set()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+
+    def run(self) -> None:
+        retomar = True
+        falhas = 0
+        while not self._parar.is_set():
+            # Um erro do banco (ex.: 'database is locked' enquanto a GUI grava) não pode
+            # matar a thread: registra, espera cada vez mais e tenta de novo
+            try:
+                if retomar:
+                    self.retomados = requeue_interrupted_print_jobs()
+                    retomar = False
+                job = claim_next_print_job()
+                if job is None:
+                    self._acordar.wait(self.intervalo)
+                    self._acordar.clear()
+                    continue
+                self._executar(job)
+                falhas = 0
+            except Exception as e:
+                falhas += 1
+                espera = min(self.intervalo * 2 ** falhas, 60.0)
+                print(f"⚠️  Fila de impressão: {e} (nova tentativa em {espera:.1f}s)")
+                self._acordar.wait(espera)
+                self._acordar.clear()
+
+    def _executar(self, job: Dict[str, Any]) -> None:
+        payload = job['payload']
+        inicio = time.perf_counter()
+        try:
+            handler = WordEtiquetaHandler(payload['template_path'], usar_cache=True)
+            arquivos = handler.criar_multiplas_paginas(
+                payload['dados_lote'],
+                payload['quantidade'],
+                extra_tags=payload.get('extra_tags'),
+                documento_unico=True,
+                rapido=payload.get('rapido', False),
+            )
+        except Exception as e:
+            permanente = isinstance(e, ERROS_PERMANENTES)
+            fail_print_job(job['id'], str(e), 0 if permanente else self.max_tentativas)
+            # Só avisa quando não haverá nova tentativa
+            if self.ao_concluir and (permanente or job['attempts'] >= self.max_tentativas):
+                self.ao_concluir(job, [], e)
+            return
+
+        complete_print_job(job['id'], arquivos, time.perf_counter() - inicio)
+        if self.ao_concluir:
+            self.ao_concluir(job, arquivos, None)
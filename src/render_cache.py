@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+
+DEFAULT_TAMANHO_MAX = 200 * 1024 * 1024  # 200 MB
+
+
+class CacheRenderizacao:
+    """Cache de documentos renderizados, endereçado pelo conteúdo.
+
+    Cada entrada é um arquivo `<sha1>.docx` dentro de `diretorio`. A chave é o
+    hash do template + dados da etiqueta (sem `data_impressao`) + quantidade +
+    tags. O tamanho total é limitado; ao passar do limite as entradas usadas
+    há mais tempo são removidas (LRU pelo mtime, atualizado a cada acerto).
+    """
+
+    def __init__(self, diretorio: str, tamanho_max: int = DEFAULT_TAMANHO_MAX):
+        self.diretorio = diretorio
+        self.tamanho_max = tamanho_max
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(template_hash: str, *partes: Any) -> str:
+        def sem_data_impressao(obj):
+            if isinstance(obj, dict):
+                return {k: sem_data_impressao(v) for k, v in obj.items() if k != 'data_impressao'}
+            if isinstance(obj, (list, tuple)):
+                return [sem_data_impressao(v) for v in obj]
+            return obj
+
+        payload = json.dumps([template_hash, sem_data_impressao(partes)], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.docx")
+
+    def copiar_para(self, chave: str, destino: str) -> bool:
+        """Em caso de acerto copia o documento para `destino` e retorna True."""
+        origem = self._caminho(chave)
+        with self._lock:
+            try:
+                shutil.copyfile(origem, destino)
+                os.utime(origem)  # marca como usado recentemente
+            except FileNotFoundError:
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def guardar(self, chave: str, arquivo: str) -> None:
+        with self._lock:
+            os.makedirs(self.diretorio, exist_ok=True)
+            shutil.copyfile(arquivo, self._caminho(chave))
+            self._evictar()
+
+    def _evictar(self) -> None:
+        entradas = []
+        total = 0
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                st = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, caminho))
+            total += st.st_size
+
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.tamanho_max:
+                break
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            total -= tamanho
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+# Uma instância por diretório, compartilhada por todos os handlers do processo
+_caches: Dict[str, CacheRenderizacao] = {}
+_caches_lock = threading.Lock()
+
+
+def obter_cache(diretorio: str, tamanho_max: Optional[int] = None) -> CacheRenderizacao:
+    chave = os.path.abspath(diretorio)
+    with _caches_lock:
+        cache = _caches.get(chave)
+        if cache is None:
+            cache = _caches[chave] = CacheRenderizacao(chave, tamanho_max or DEFAULT_TAMANHO_MAX)
+        elif tamanho_max:
+            cache.tamanho_max = tamanho_max
+        return cache
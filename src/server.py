@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from api.brewfather_api import BrewfatherAPI
+from db.sqlite_db import (
+    init_schema,
+    fetch_batches_filtered,
+    fetch_batch_events,
+    get_batch_with_overrides,
+    get_batch_override,
+    get_recipe_for_batch,
+    list_tags,
+)
+from models import BOTTLING_EVENT
+from print_jobs import criar_pool, renderizar_bytes_job
+from settings import get_template_path_from_settings, read_env
+from sync import (
+    sincronizar_historico,
+    sincronizar_incremental,
+    sincronizar_leituras,
+    sincronizar_lotes,
+    sincronizar_receitas,
+    valores_das_leituras,
+)
+
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def _dados_lote_do_banco(batch_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Monta (dados_lote, tags) para impressão a partir do banco, já com overrides aplicados."""
+    b = get_batch_with_overrides(batch_id)
+    if not b:
+        return None
+    b.bottling_event = next((ev for ev in fetch_batch_events(batch_id) if ev.event_type == BOTTLING_EVENT), None)
+    dados_lote = b.to_dict()
+
+    tags = {t['tag_key']: t['tag_value'] for t in list_tags(batch_id)}
+    ov = get_batch_override(batch_id) or {}
+    if ov.get('observation'):
+        tags.setdefault('observacao', ov.get('observation'))
+    # Placeholders {estilo}, {lupulos} e {levedura} vindos do catálogo local de receitas
+    receita = get_recipe_for_batch(batch_id)
+    if receita:
+        for tag, coluna in (('estilo', 'style'), ('lupulos', 'hops'), ('levedura', 'yeasts')):
+            if receita.get(coluna):
+                tags.setdefault(tag, receita[coluna])
+    # Placeholders {fg} e {abv_real}, quando há leituras de densímetro gravadas
+    leituras = valores_das_leituras(batch_id)
+    if leituras:
+        tags.setdefault('fg', f"{leituras['fg']:.3f}")
+        tags.setdefault('abv_real', f"{leituras['abv_real']}%")
+    return dados_lote, tags
+
+
+async def listar_lotes(request: Request) -> JSONResponse:
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        return JSONResponse({'erro': 'limit inválido'}, status_code=400)
+    start = request.query_params.get('start') or None
+    end = request.query_params.get('end') or None
+
+    batches = await run_in_threadpool(fetch_batches_filtered, limit=limit, start_date=start, end_date=end)
+    return JSONResponse([b.to_dict() for b in batches])
+
+
+async def gerar_etiquetas(request: Request) -> Response:
+    batch_id = request.path_params['batch_id']
+    try:
+        corpo = await request.json() if await request.body() else {}
+        if not isinstance(corpo, dict):
+            raise TypeError('corpo deve ser um objeto JSON')
+        quantidade = int(corpo.get('quantidade', 1))
+    except (ValueError, TypeError):
+        return JSONResponse({'erro': 'corpo/quantidade inválidos'}, status_code=400)
+    if quantidade <= 0:
+        return JSONResponse({'erro': 'quantidade deve ser maior que zero'}, status_code=400)
+    tags_corpo = corpo.get('tags') or {}
+    if not isinstance(tags_corpo, dict):
+        return JSONResponse({'erro': 'tags deve ser um objeto JSON'}, status_code=400)
+
+    resultado = await run_in_threadpool(_dados_lote_do_banco, batch_id)
+    if not resultado:
+        return JSONResponse({'erro': f'lote {batch_id} não encontrado no banco'}, status_code=404)
+    dados_lote, tags = resultado
+    tags.update(tags_corpo)
+
+    app = request.app
+    template_path = app.state.template_path
+    if not os.path.exists(template_path):
+        return JSONResponse({'erro': f'modelo não encontrado: {template_path}'}, status_code=500)
+
+    # Renderização fora do event loop, no pool de processos
+    loop = asyncio.get_running_loop()
+    conteudo = await loop.run_in_executor(
+        app.state.pool, renderizar_bytes_job, template_path, dados_lote, quantidade, tags
+    )
+    nome = f"etiqueta_{dados_lote.get('batchNo')}.docx"
+    return Response(conteudo, media_type=DOCX_MIME, headers={'Content-Disposition': f'attachment; filename="{nome}"'})
+
+
+async def sincronizar(request: Request) -> JSONResponse:
+    api = request.app.state.api
+    if api is None:
+        return JSONResponse({'erro': 'API Brewfather não inicializada'}, status_code=503)
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        return JSONResponse({'erro': 'limit inválido'}, status_code=400)
+
+    if request.query_params.get('leituras') in ('1', 'true', 'sim'):
+        batch_id = request.query_params.get('batch_id')
+        if not batch_id:
+            return JSONResponse({'erro': 'batch_id é obrigatório para sincronizar leituras'}, status_code=400)
+        salvos = await run_in_threadpool(sincronizar_leituras, api, batch_id)
+    elif request.query_params.get('receitas') in ('1', 'true', 'sim'):
+        salvos = await run_in_threadpool(sincronizar_receitas, api, min(limit, 50))
+    elif request.query_params.get('incremental') in ('1', 'true', 'sim'):
+        salvos = await run_in_threadpool(sincronizar_incremental, api, min(limit, 50))
+    elif request.query_params.get('completo') in ('1', 'true', 'sim'):
+        salvos = await run_in_threadpool(sincronizar_historico, api, min(limit, 50))
+    else:
+        salvos = await run_in_threadpool(sincronizar_lotes, api, limit)
+    if salvos is None:
+        return JSONResponse({'erro': 'falha na requisição à API'}, status_code=502)
+    return JSONResponse({'salvos': salvos})
+
+
+def create_app(template_path: Optional[str] = None, max_workers: Optional[int] = None) -> Starlette:
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        await run_in_threadpool(init_schema)
+        app.state.template_path = template_path or get_template_path_from_settings()
+        try:
+            app.state.api = BrewfatherAPI()
+        except Exception as e:
+            print(f"⚠️  API Brewfather indisponível: {e}")
+            app.state.api = None
+        app.state.pool = criar_pool(app.state.template_path, max_workers)
+        try:
+            yield
+        finally:
+            app.state.pool.shutdown(wait=False, cancel_futures=True)
+
+    return Starlette(
+        routes=[
+            Route('/batches', listar_lotes, methods=['GET']),
+            Route('/batches/{batch_id}/labels', gerar_etiquetas, methods=['POST']),
+            Route('/sync', sincronizar, methods=['POST']),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def run_server(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    import uvicorn
+
+    env = read_env()
+    host = host or env.get('SERVER_HOST') or '127.0.0.1'
+    port = port or int(env.get('SERVER_PORT') or 8765)
+    print(f"🌐 Servidor de etiquetas em http://{host}:{port}")
+    uvicorn.run(create_app(), host=host, port=port)
@@ -73,7 +73,7 @@ def write_env(updates: dict) -> None:
 
 def get_start_mode() -> str:
     env = read_env()
-    # values: 'cli' | 'gui' | 'ask'
+    # values: 'cli' | 'gui' | 'server' | 'ask'
     return env.get('START_MODE', 'ask').lower()
 
 
@@ -0,0 +1,207 @@
+import json
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from api.brewfather_api import CAMPOS_LISTA
+from db.sqlite_db import (
+    get_last_reading_time,
+    get_readings_summary,
+    get_setting,
+    insert_batch_event,
+    insert_readings,
+    iter_batch_raw,
+    set_setting,
+    upsert_batch,
+    upsert_batches,
+    upsert_batches_raw,
+    upsert_recipes,
+)
+from models import Batch
+
+
+def salvar_lista_lotes(batches: List[Batch]) -> int:
+    """Salva/atualiza lotes na visão de lista (listBatches) no SQLite. Retorna quantos foram salvos."""
+    salvos = 0
+    for b in batches:
+        try:
+            upsert_batch(b)
+            salvos += 1
+        except Exception as e:
+            print(f"⚠️  Falha ao salvar lote {b.id}: {e}")
+    return salvos
+
+
+def sincronizar_lotes(api, limit: int = 50) -> Optional[int]:
+    """Busca os lotes mais recentes na API e grava no banco. Retorna None se a API falhar."""
+    batches = api.listBatches(limit)
+    if batches is None:
+        return None
+    return salvar_lista_lotes(batches)
+
+
+def sincronizar_historico(api, page_size: int = 50) -> Optional[int]:
+    """
+    Percorre todo o histórico de lotes na API e grava no banco, uma página por
+    transação (memória constante). Retorna None se alguma página falhar; o que
+    já foi gravado até ali permanece.
+    """
+    lotes = api.iterar_lotes(page_size)
+    salvos = 0
+    try:
+        while True:
+            pagina = list(islice(lotes, page_size))
+            if not pagina:
+                return salvos
+            salvos += upsert_batches(pagina)
+    except RuntimeError as e:
+        print(f"⚠️  Sincronização interrompida: {e}")
+        return None
+
+
+CHAVE_WATERMARK = 'sync_batches_timemodified'
+
+
+def _ler_marca(chave: str) -> Tuple[Optional[int], Set[str]]:
+    """Marca d'água: maior `_timemodified` visto e os _id que têm exatamente esse valor."""
+    valor = get_setting(chave)
+    ids = get_setting(f'{chave}_ids')
+    return (int(valor) if valor else None), set(json.loads(ids)) if ids else set()
+
+
+def _avancar_marca(chave: str, marca: Tuple[Optional[int], Set[str]], pagina: List[Dict[str, Any]]):
+    """Grava a marca após uma página; os _id empatados no maior valor entram junto."""
+    maior = max((item.get('_timemodified') or 0) for item in pagina)
+    if not maior:
+        return marca
+    ids = {item.get('_id') for item in pagina if item.get('_timemodified') == maior}
+    if maior == marca[0]:
+        ids |= marca[1]
+    set_setting(chave, str(maior))
+    set_setting(f'{chave}_ids', json.dumps(sorted(ids)))
+    return maior, ids
+
+
+def sincronizar_incremental(api, page_size: int = 50) -> Optional[int]:
+    """
+    Busca só os lotes alterados desde a última sincronização (maior
+    `_timemodified` visto, guardado em app_settings) e grava em lote. Sem
+    alterações, custa uma única requisição pequena. A marca avança página a
+    página, então uma falha no meio não perde o que já foi gravado; lotes com
+    o mesmo `_timemodified` da marca voltam na próxima vez e só os já gravados
+    (ids guardados com a marca) são descartados.
+    """
+    marca = _ler_marca(CHAVE_WATERMARK)
+    lotes = api.iterar_batches(page_size, order_by='_timemodified', start_after=marca[0],
+                               include=CAMPOS_LISTA, ja_vistos=marca[1])
+    salvos = 0
+    try:
+        while True:
+            pagina = list(islice(lotes, page_size))
+            if not pagina:
+                return salvos
+            salvos += upsert_batches(Batch.from_api(b) for b in pagina)
+            marca = _avancar_marca(CHAVE_WATERMARK, marca, pagina)
+    except RuntimeError as e:
+        print(f"⚠️  Sincronização interrompida: {e}")
+        return None
+
+
+def _gravar_derivados(docs: List[Dict[str, Any]]) -> int:
+    lotes = [Batch.from_api(doc) for doc in docs]
+    salvos = upsert_batches(lotes)
+    for lote in lotes:
+        if lote.bottling_event:
+            insert_batch_event(lote.id, lote.bottling_event)
+    return salvos
+
+
+def arquivar_historico(api, page_size: int = 50) -> Optional[int]:
+    """
+    Baixa os documentos completos de todo o histórico, guarda cada um
+    comprimido em batch_raw e atualiza os campos derivados (batches/eventos).
+    Retorna None se alguma página falhar.
+    """
+    docs = api.iterar_batches(page_size, complete=True)
+    salvos = 0
+    try:
+        while True:
+            pagina = list(islice(docs, page_size))
+            if not pagina:
+                return salvos
+            upsert_batches_raw(pagina)
+            salvos += _gravar_derivados(pagina)
+    except RuntimeError as e:
+        print(f"⚠️  Arquivamento interrompido: {e}")
+        return None
+
+
+def reextrair_lotes(page_size: int = 200) -> int:
+    """
+    Recalcula os campos derivados de todos os lotes a partir de batch_raw,
+    sem nenhuma chamada à API (ex.: depois de criar um placeholder novo).
+    """
+    docs = iter_batch_raw(page_size)
+    salvos = 0
+    while True:
+        pagina = list(islice(docs, page_size))
+        if not pagina:
+            return salvos
+        salvos += _gravar_derivados(pagina)
+
+
+def sincronizar_leituras(api, batch_id: str) -> Optional[int]:
+    """
+    Grava as leituras novas do batch (posteriores à última já guardada).
+    Retorna quantas entraram, ou None se a API falhar.
+    """
+    leituras = api.GetBatchReadings(batch_id)
+    if leituras is None:
+        return None
+    ultima = get_last_reading_time(batch_id)
+    if ultima is not None:
+        leituras = [r for r in leituras if (r.get('time') or 0) > ultima]
+    return insert_readings(batch_id, leituras)
+
+
+def valores_das_leituras(batch_id: str, og: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Valores derivados das leituras guardadas: FG (última densidade) e ABV real
+    ((OG - FG) * 131.25, com a OG medida do lote ou a primeira leitura).
+    """
+    resumo = get_readings_summary(batch_id)
+    if not resumo or resumo['last_sg'] is None:
+        return None
+    og = og or resumo['first_sg']
+    fg = resumo['last_sg']
+    return {
+        'og': round(og, 3),
+        'fg': round(fg, 3),
+        'abv_real': round((og - fg) * 131.25, 1),
+        'leituras': resumo['total'],
+    }
+
+
+CHAVE_WATERMARK_RECEITAS = 'sync_recipes_timemodified'
+
+
+def sincronizar_receitas(api, page_size: int = 50) -> Optional[int]:
+    """
+    Sincroniza o catálogo de receitas (endpoint /recipes) de forma incremental,
+    como `sincronizar_incremental` (mesma marca com desempate por _id): cada
+    receita fica gravada uma vez, por id e horário de modificação, e os lotes
+    apontam para ela via recipe_id.
+    Retorna quantas receitas mudaram, ou None se a API falhar.
+    """
+    marca = _ler_marca(CHAVE_WATERMARK_RECEITAS)
+    receitas = api.iterar_recipes(page_size, start_after=marca[0], ja_vistos=marca[1])
+    salvas = 0
+    try:
+        while True:
+            pagina = list(islice(receitas, page_size))
+            if not pagina:
+                return salvas
+            salvas += upsert_recipes(pagina)
+            marca = _avancar_marca(CHAVE_WATERMARK_RECEITAS, marca, pagina)
+    except RuntimeError as e:
+        print(f"⚠️  Sincronização de receitas interrompida: {e}")
+        return None
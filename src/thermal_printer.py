@@ -0,0 +1,97 @@
+from typing import Any, Dict, Optional
+
+from word_handler import _PLACEHOLDER_RE, montar_dados_etiqueta
+
+
+# Layout em pontos (dots) da impressora; 203 dpi -> 8 dots/mm (400x240 ≈ 50x30 mm)
+LAYOUT_PADRAO: Dict[str, Any] = {
+    'largura': 400,
+    'altura': 240,
+    'campos': [
+        {'texto': '{receita}', 'x': 20, 'y': 12, 'tamanho': 36},
+        {'texto': 'Lote: {lote}', 'x': 20, 'y': 60, 'tamanho': 22},
+        {'texto': 'IBU: {ibu}   ABV: {abv}', 'x': 20, 'y': 88, 'tamanho': 22},
+        {'texto': 'EBC: {estimatedColor}', 'x': 20, 'y': 116, 'tamanho': 22},
+        {'texto': 'Produção: {data_brassagem}', 'x': 20, 'y': 144, 'tamanho': 22},
+        {'texto': 'Envase: {data_engarrafamento}', 'x': 20, 'y': 172, 'tamanho': 22},
+    ],
+}
+
+
+def _formatar(texto: str, dados: Dict[str, Any]) -> str:
+    return _PLACEHOLDER_RE.sub(lambda m: '' if dados.get(m.group(1)) is None else str(dados[m.group(1)]), texto)
+
+
+def _zpl_escape(texto: str) -> str:
+    # Usado com ^FH: caracteres de controle do ZPL viram hexadecimal
+    return texto.replace('\\', '\\5C').replace('^', '\\5E').replace('~', '\\7E')
+
+
+def _validar_quantidade(quantidade: int) -> None:
+    # Mesma regra das folhas: job vazio é erro, não uma etiqueta física a mais
+    if int(quantidade) <= 0:
+        raise ValueError("Nenhuma etiqueta para gerar: a quantidade deve ser maior que zero.")
+
+
+def renderizar_zpl(dados: Dict[str, Any], quantidade: int = 1, layout: Optional[Dict[str, Any]] = None) -> bytes:
+    """Gera o ZPL de uma etiqueta; a impressora repete `quantidade` cópias (^PQ)."""
+    _validar_quantidade(quantidade)
+    layout = layout or LAYOUT_PADRAO
+    linhas = ['^XA', '^CI28', f"^PW{layout['largura']}", f"^LL{layout['altura']}"]
+    for campo in layout['campos']:
+        t = campo.get('tamanho', 22)
+        texto = _zpl_escape(_formatar(campo['texto'], dados))
+        linhas.append(f"^FO{campo['x']},{campo['y']}^A0N,{t},{t}^FH\\^FD{texto}^FS")
+    linhas.append(f'^PQ{int(quantidade)}')
+    linhas.append('^XZ')
+    return ('\n'.join(linhas) + '\n').encode('utf-8')
+
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+
+def renderizar_escpos(dados: Dict[str, Any], quantidade: int = 1, layout: Optional[Dict[str, Any]] = None,
+                      encoding: str = 'cp850') -> bytes:
+    """Gera ESC/POS: uma etiqueta (campos em ordem de `y`, ampliados por `tamanho`) seguida de corte.
+
+    O bloco é montado uma vez e repetido `quantidade` vezes.
+    """
+    _validar_quantidade(quantidade)
+    layout = layout or LAYOUT_PADRAO
+    bloco = bytearray()
+    bloco += ESC + b'@'          # inicializa
+    bloco += ESC + b't\x02'      # tabela de caracteres PC850 (acentos)
+    for campo in sorted(layout['campos'], key=lambda c: c['y']):
+        mult = max(1, min(8, round(campo.get('tamanho', 22) / 24)))
+        bloco += GS + b'!' + bytes([((mult - 1) << 4) | (mult - 1)])
+        bloco += _formatar(campo['texto'], dados).encode(encoding, errors='replace') + b'\n'
+    bloco += GS + b'!\x00'
+    bloco += GS + b'V\x42\x00'   # avança e corta
+    return bytes(bloco) * int(quantidade)
+
+
+def gerar_etiquetas_termicas(dados_lote: Dict[str, Any], quantidade: int, extra_tags: Optional[Dict[str, Any]] = None,
+                             formato: str = 'zpl', layout: Optional[Dict[str, Any]] = None) -> bytes:
+    """Monta os dados como em `criar_etiquetas` e gera o fluxo para a impressora térmica."""
+    dados = montar_dados_etiqueta(dados_lote, extra_tags)
+    if formato == 'zpl':
+        return renderizar_zpl(dados, quantidade, layout)
+    if formato == 'escpos':
+        return renderizar_escpos(dados, quantidade, layout)
+    raise ValueError(f"Formato de impressora desconhecido: {formato}")
+
+
+def enviar_serial(conteudo: bytes, porta: str, baudrate: int = 9600, timeout: float = 10.0) -> None:
+    """Envia o fluxo para a impressora por porta serial (ex.: COM3, /dev/ttyUSB0)."""
+    import serial  # pyserial
+
+    with serial.Serial(porta, baudrate=baudrate, timeout=timeout, write_timeout=timeout) as s:
+        s.write(conteudo)
+        s.flush()
+
+
+def gravar_arquivo(conteudo: bytes, caminho: str) -> None:
+    """Grava o fluxo em um arquivo ou dispositivo (ex.: pty, /dev/usb/lp0, compartilhamento)."""
+    with open(caminho, 'wb') as f:
+        f.write(conteudo)
@@ -1,16 +1,450 @@
 import os
+import re
+import hashlib
+import threading
+import uuid
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape as xml_escape
 from datetime import datetime
 from docx import Document
 from docx.shared import Pt
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsdecls
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from lxml import etree
 from copy import deepcopy
+from itertools import chain, repeat
+from render_cache import CacheRenderizacao, obter_cache
 import sys
 #from docx.oxml import OxmlElement
 
+
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+# Formatação aplicada ao run do parágrafo que contém o placeholder (atributos de run.font)
+REGRAS_FORMATACAO = {
+    'receita': {'size': Pt(14)},   # tamanho de fonte em pontos
+}
+
+
+class TemplateCompilado:
+    """Template .docx pré-processado uma única vez.
+
+    Guarda o conteúdo bruto do arquivo, o mapa de slots da tabela principal
+    (``doc.tables[0]``), o XML da tabela modelo (``cell(0, 0).tables[0]``) e a
+    localização dos placeholders dentro dela.
+    """
+
+    def __init__(self, path: str, conteudo: bytes, mtime_ns: int, tamanho: int):
+        self.path = path
+        self.conteudo = conteudo
+        self.mtime_ns = mtime_ns
+        self.tamanho = tamanho
+        self.hash = hashlib.sha1(conteudo).hexdigest()
+        self.ooxml = None  # TemplateOOXML, compilado sob demanda pelo caminho rápido
+
+        doc = self.novo_documento()
+        tabela = doc.tables[0]
+
+        # Slots de etiqueta: (linha, coluna) das colunas ímpares (0,2,4,...)
+        self.slots = []
+        for row_idx, row in enumerate(tabela.rows):
+            for col_idx in range(len(row.cells)):
+                if col_idx % 2 == 0:
+                    self.slots.append((row_idx, col_idx))
+
+        # Cópia intacta da tabela principal (usada para novas páginas)
+        self.tabela_xml = deepcopy(tabela._element)
+
+        modelo_tabela = tabela.cell(0, 0).tables[0]
+        self.modelo_xml = deepcopy(modelo_tabela._element)
+
+        # Geometria em pontos, para renderizadores que desenham a folha sem o Word (PDF/HTML)
+        secao = doc.sections[0]
+        larguras = [c.width.pt if c.width is not None else 0 for c in tabela.columns]
+        alturas = [r.height.pt if r.height is not None else None for r in tabela.rows]
+        altura_util = secao.page_height.pt - secao.top_margin.pt - secao.bottom_margin.pt
+        altura_padrao = altura_util / max(1, len(alturas))
+        alturas = [a or altura_padrao for a in alturas]
+        self.geometria = {
+            'pagina': (secao.page_width.pt, secao.page_height.pt),
+            'slots': [
+                (
+                    secao.left_margin.pt + sum(larguras[:col_idx]),
+                    secao.top_margin.pt + sum(alturas[:row_idx]),
+                    larguras[col_idx],
+                    alturas[row_idx],
+                )
+                for row_idx, col_idx in self.slots
+            ],
+            'colunas_modelo': [c.width.pt if c.width is not None else 0 for c in modelo_tabela.columns],
+            # Texto de cada célula da tabela modelo, por linha (linhas sem texto são ignoradas)
+            'linhas_modelo': [
+                linha for linha in (
+                    ['\n'.join(Paragraph(p, None).text for p in tc.p_lst) for tc in tr.tc_lst]
+                    for tr in self.modelo_xml.tr_lst
+                ) if any(linha)
+            ],
+        }
+
+        # Placeholders: ((linha, célula, parágrafo), chaves) dentro da tabela modelo
+        self.placeholders = []
+        for i, tr in enumerate(self.modelo_xml.tr_lst):
+            for j, tc in enumerate(tr.tc_lst):
+                for k, p in enumerate(tc.p_lst):
+                    texto = ''.join(t.text or '' for t in p.iter(qn('w:t')))
+                    chaves = tuple(_PLACEHOLDER_RE.findall(texto))
+                    if chaves:
+                        self.placeholders.append(((i, j, k), chaves))
+
+    @property
+    def etiquetas_por_pagina(self) -> int:
+        return len(self.slots)
+
+    def novo_documento(self):
+        """Abre um novo Document a partir do conteúdo em memória (sem ler o disco)."""
+        return Document(BytesIO(self.conteudo))
+
+
+# Cache de templates compilados por processo: caminho -> TemplateCompilado
+_templates_cache: dict = {}
+_templates_lock = threading.Lock()
+
+
+def obter_template(template_path: str) -> TemplateCompilado:
+    """Retorna o template compilado do cache, recarregando apenas se o arquivo mudou."""
+    chave = os.path.abspath(template_path)
+    st = os.stat(chave)
+    with _templates_lock:
+        atual = _templates_cache.get(chave)
+        if atual and atual.mtime_ns == st.st_mtime_ns and atual.tamanho == st.st_size:
+            return atual
+
+    with open(chave, 'rb') as f:
+        conteudo = f.read()
+
+    with _templates_lock:
+        atual = _templates_cache.get(chave)
+        # mtime alterado mas conteúdo idêntico (ex.: arquivo copiado/tocado): reaproveita
+        if atual and atual.hash == hashlib.sha1(conteudo).hexdigest():
+            atual.mtime_ns, atual.tamanho = st.st_mtime_ns, st.st_size
+            return atual
+
+    compilado = TemplateCompilado(chave, conteudo, st.st_mtime_ns, st.st_size)
+    with _templates_lock:
+        _templates_cache[chave] = compilado
+    return compilado
+
+
+def montar_dados_etiqueta(dados_lote: dict, extra_tags: dict | None = None) -> dict:
+    """Monta o dicionário de placeholders da etiqueta a partir do lote."""
+    dados = {
+        'lote': dados_lote.get('batchNo', ''),
+        'receita': dados_lote.get('name', ''),
+        'abv': f"{dados_lote.get('measuredAbv', '')}%" if dados_lote.get('measuredAbv') else '',
+        'ibu': str(dados_lote.get('estimatedIbu', '')),
+        'estimatedColor': str(dados_lote.get('estimatedColor', '')),
+        'data_brassagem': dados_lote.get('brewDate', ''),
+        'data_engarrafamento': dados_lote.get('bottling_event', {}).get('time', '') if dados_lote.get('bottling_event') else '',
+        'data_impressao': datetime.now().strftime('%d/%m/%Y %H:%M')
+    }
+
+    if extra_tags:
+        for k, v in extra_tags.items():
+            if k not in dados:
+                dados[k] = v
+
+    return dados
+
+
+def nome_arquivo_saida(prefixo: str, extensao: str) -> str:
+    """Nome do arquivo gerado: prefixo, data/hora e um sufixo aleatório, para que jobs
+    do mesmo lote renderizados no mesmo segundo (em paralelo ou pela fila) não colidam."""
+    return f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{extensao}"
+
+
+def paginar(etiquetas, etiquetas_por_pagina: int, slot_inicial: int = 0):
+    """Distribui as etiquetas (dados de cada uma, em ordem) pelos slots, página a página.
+
+    Cada página é uma lista de dados por slot (None = slot vazio). `slot_inicial`
+    pula os primeiros slots da primeira página (folha já usada em parte) e deve
+    ficar entre 0 e `etiquetas_por_pagina - 1`; fora disso levanta ValueError
+    já na chamada, antes de qualquer arquivo ser criado.
+    """
+    if not 0 <= slot_inicial < etiquetas_por_pagina:
+        raise ValueError(
+            f"slot_inicial inválido: {slot_inicial} (a folha tem {etiquetas_por_pagina} slots, de 0 a {etiquetas_por_pagina - 1})."
+        )
+    return _distribuir(etiquetas, etiquetas_por_pagina, [None] * slot_inicial)
+
+
+def _distribuir(etiquetas, etiquetas_por_pagina: int, pagina: list):
+    for dados in etiquetas:
+        pagina.append(dados)
+        if len(pagina) == etiquetas_por_pagina:
+            yield pagina
+            pagina = []
+    if pagina and pagina[-1] is not None:
+        yield pagina
+
+
+def exigir_etiquetas(paginas):
+    """Devolve as páginas de `paginar` ou levanta ValueError se o job não tem nenhuma etiqueta.
+
+    Consome só a primeira página, para que o erro saia antes de criar o arquivo de saída.
+    """
+    paginas = iter(paginas)
+    primeira = next(paginas, None)
+    if not primeira or all(dados is None for dados in primeira):
+        raise ValueError("Nenhuma etiqueta para gerar: a quantidade deve ser maior que zero.")
+    return chain([primeira], paginas)
+
+
+def registrar_template(template_path: str, conteudo: bytes, mtime_ns: int, tamanho: int) -> TemplateCompilado:
+    """Compila e coloca no cache um template já lido (ex.: enviado a um processo worker)."""
+    chave = os.path.abspath(template_path)
+    compilado = TemplateCompilado(chave, conteudo, mtime_ns, tamanho)
+    with _templates_lock:
+        _templates_cache[chave] = compilado
+    return compilado
+
+
+def _paragrafo_quebra_pagina():
+    """Parágrafo (com marca oculta) contendo apenas uma quebra de página."""
+    return parse_xml(
+        f'<w:p {nsdecls("w")}><w:pPr><w:rPr><w:vanish/></w:rPr></w:pPr>'
+        '<w:r><w:br w:type="page"/></w:r></w:p>'
+    )
+
+
+def _conteudo_run(texto: str) -> str:
+    """XML do conteúdo de um run para `texto`, como o python-docx geraria (tab/quebra/w:t)."""
+    partes = []
+    for parte in re.split(r'(\t|\r|\n)', texto):
+        if not parte:
+            continue
+        if parte == '\t':
+            partes.append('<w:tab/>')
+        elif parte in '\r\n':
+            partes.append('<w:br/>')
+        elif len(parte.strip()) < len(parte):
+            partes.append(f'<w:t xml:space="preserve">{xml_escape(parte)}</w:t>')
+        else:
+            partes.append(f'<w:t>{xml_escape(parte)}</w:t>')
+    return ''.join(partes)
+
+
+class TemplateOOXML:
+    """`word/document.xml` do template pré-compilado como texto, para o caminho rápido.
+
+    O XML é quebrado em trechos fixos (cabeçalho, abertura/fechamento da tabela
+    principal, trechos entre slots, rodapé) e, para cada slot, nas variantes
+    original (como no template), limpa (slot pulado) e preenchida. Na variante preenchida os parágrafos com placeholders
+    viram parâmetros, substituídos por texto escapado na hora de gravar. Os
+    trechos são obtidos serializando documentos montados pelo próprio
+    `WordEtiquetaHandler`, então o resultado é idêntico ao de `criar_etiquetas`.
+    """
+
+    _MARCA = '@@VE@@'
+
+    def __init__(self, template: TemplateCompilado, handler: 'WordEtiquetaHandler'):
+        self.template = template
+        n_slots = len(template.slots)
+
+        # Textos originais dos parágrafos com placeholders (mesma ordem de template.placeholders)
+        self.textos = [
+            Paragraph(template.modelo_xml.tr_lst[i].tc_lst[j].p_lst[k], None).text
+            for (i, j, k), _ in template.placeholders
+        ]
+
+        # 1) Estrutura: documento intacto com marcas na tabela principal, slots e quebra de página
+        doc = template.novo_documento()
+        tabela = doc.tables[0]
+        tabela._element.addprevious(etree.Comment('ve:ini'))
+        tabela._element.addnext(etree.Comment('ve:fim'))
+        self._marcar_slots(tabela, template)
+        quebra = _paragrafo_quebra_pagina()
+        doc.element.body.append(etree.Comment('ve:q'))
+        doc.element.body.append(quebra)
+        doc.element.body.append(etree.Comment('ve:/q'))
+        xml = self._serializar(doc)
+        xml, self.quebra = self._recortar(xml, '<!--ve:q-->', '<!--ve:/q-->')
+        self.cabecalho, resto = xml.split('<!--ve:ini-->')
+        tabela_xml, self.rodape = resto.split('<!--ve:fim-->')
+        self.fixos, self.vazios = self._separar_slots(tabela_xml, n_slots)
+
+        # 2) Slots limpos (pulados com slot_inicial): a célula (0, 0) do template traz a tabela modelo
+        doc = template.novo_documento()
+        tabela = doc.tables[0]
+        rows = tabela.rows
+        for row_idx, col_idx in template.slots:
+            handler._limpar_celula(rows[row_idx].cells[col_idx])
+        self._marcar_slots(tabela, template)
+        self.limpos = self._separar_slots(self._serializar(doc), n_slots)[1]
+
+        # 3) Parágrafos originais (usados quando nenhuma chave do parágrafo vem nos dados)
+        doc = template.novo_documento()
+        modelo = doc.tables[0].cell(0, 0).tables[0]._element
+        for (i, j, k), _ in template.placeholders:
+            p = modelo.tr_lst[i].tc_lst[j].p_lst[k]
+            p.addprevious(etree.Comment('ve:p'))
+            p.addnext(etree.Comment('ve:/p'))
+        xml = self._serializar(doc)
+        self.originais = re.findall(r'<!--ve:p-->(.*?)<!--ve:/p-->', xml, re.S)
+
+        # 4) Slots preenchidos com marcadores; estilos capturados após 1 e após 2+ preenchimentos
+        doc = template.novo_documento()
+        tabela = doc.tables[0]
+        marcadores = {chave: self._MARCA for _, chaves in template.placeholders for chave in chaves}
+        rows = tabela.rows
+        self.estilos = {}
+        for n, (row_idx, col_idx) in enumerate(template.slots, start=1):
+            cell = rows[row_idx].cells[col_idx]
+            handler._limpar_celula(cell)
+            handler._preencher_tabela(template, cell, marcadores)
+            if n <= 2:
+                self.estilos[n] = doc.part._styles_part.blob
+            nova = cell.tables[-1]._element
+            for (i, j, k), _ in template.placeholders:
+                p = nova.tr_lst[i].tc_lst[j].p_lst[k]
+                p.addprevious(etree.Comment('ve:p'))
+                p.addnext(etree.Comment('ve:/p'))
+        self.estilos.setdefault(2, self.estilos[1])
+        self._marcar_slots(tabela, template)
+        preenchidos = self._separar_slots(self._serializar(doc), n_slots)[1]
+
+        # Cada slot preenchido vira [literal, (idx, prefixo, sufixo), literal, ...]
+        self.preenchidos = []
+        for xml_slot in preenchidos:
+            pecas = re.split(r'<!--ve:p-->(.*?)<!--ve:/p-->', xml_slot, flags=re.S)
+            slot = []
+            for n, peca in enumerate(pecas):
+                if n % 2 == 0:
+                    slot.append(peca)
+                    continue
+                prefixo, sufixo = re.split(r'<w:t(?: [^>]*)?>[^<]*' + self._MARCA + r'[^<]*</w:t>', peca)
+                slot.append((n // 2, prefixo, sufixo))
+            self.preenchidos.append(slot)
+
+        # Demais partes do pacote, copiadas byte a byte
+        with zipfile.ZipFile(BytesIO(template.conteudo)) as z:
+            self.partes = [(info.filename, z.read(info.filename)) for info in z.infolist()]
+        self.estilos[0] = dict(self.partes).get('word/styles.xml')
+
+    def _marcar_slots(self, tabela, template) -> None:
+        rows = tabela.rows
+        for n, (row_idx, col_idx) in enumerate(template.slots):
+            tc = rows[row_idx].cells[col_idx]._tc
+            tc.insert(0, etree.Comment(f've:a{n}'))
+            tc.append(etree.Comment(f've:b{n}'))
+
+    @staticmethod
+    def _serializar(doc) -> str:
+        return etree.tostring(doc.element, encoding='UTF-8', standalone=True).decode('utf-8')
+
+    @staticmethod
+    def _recortar(xml: str, inicio: str, fim: str):
+        a, resto = xml.split(inicio)
+        meio, b = resto.split(fim)
+        return a + b, meio
+
+    def _separar_slots(self, xml: str, n_slots: int):
+        fixos, slots = [], []
+        for n in range(n_slots):
+            antes, xml = xml.split(f'<!--ve:a{n}-->')
+            slot, xml = xml.split(f'<!--ve:b{n}-->')
+            fixos.append(antes)
+            slots.append(slot)
+        fixos.append(xml)
+        return fixos, slots
+
+    def _renderizar_slot(self, n: int, dados: dict, memo: dict) -> str:
+        partes = []
+        for peca in self.preenchidos[n]:
+            if isinstance(peca, str):
+                partes.append(peca)
+                continue
+            idx, prefixo, sufixo = peca
+            chaves = self.template.placeholders[idx][1]
+            if not any(chave in dados for chave in chaves):
+                partes.append(self.originais[idx])
+                continue
+            texto = _PLACEHOLDER_RE.sub(
+                lambda m: str(dados[m.group(1)]) if m.group(1) in dados else m.group(0),
+                self.textos[idx],
+            )
+            conteudo = memo.get(texto)
+            if conteudo is None:
+                conteudo = memo[texto] = _conteudo_run(texto)
+            if not conteudo and prefixo.endswith('<w:r>') and sufixo.startswith('</w:r>'):
+                partes.append(prefixo[:-len('<w:r>')] + '<w:r/>' + sufixo[len('</w:r>'):])
+            else:
+                partes.append(prefixo + conteudo + sufixo)
+        return ''.join(partes)
+
+    def _documento_xml(self, paginas, contador: list):
+        """Gera o document.xml em pedaços. `paginas`: listas de dados por slot (None = slot pulado)."""
+        yield self.cabecalho
+        memo = {}
+        for n_pagina, pagina in enumerate(paginas):
+            if n_pagina:
+                yield self.quebra
+            for n, fixo in enumerate(self.fixos[:-1]):
+                yield fixo
+                if n >= len(pagina):
+                    yield self.vazios[n]
+                elif pagina[n] is None:
+                    yield self.limpos[n]
+                else:
+                    contador[0] += 1
+                    yield self._renderizar_slot(n, pagina[n], memo)
+            yield self.fixos[-1]
+        yield self.rodape
+
+    def escrever(self, paginas, destino) -> None:
+        """Grava o .docx em `destino` (caminho ou stream), transmitindo o document.xml."""
+        contador = [0]
+        estilos_pendentes = None
+        documento_escrito = False
+        with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as z:
+            for nome, conteudo in self.partes:
+                if nome == 'word/document.xml':
+                    with z.open('word/document.xml', 'w') as f:
+                        for trecho in self._documento_xml(paginas, contador):
+                            f.write(trecho.encode('utf-8'))
+                    documento_escrito = True
+                    if estilos_pendentes is not None:
+                        z.writestr(estilos_pendentes, self.estilos[min(contador[0], 2)])
+                elif nome == 'word/styles.xml':
+                    # styles.xml depende de quantas etiquetas foram preenchidas (ver _preencher_tabela)
+                    if documento_escrito:
+                        z.writestr(nome, self.estilos[min(contador[0], 2)])
+                    else:
+                        estilos_pendentes = nome
+                else:
+                    z.writestr(nome, conteudo)
+
+
 class WordEtiquetaHandler:
-    def __init__(self, template_path: str):
+    def __init__(self, template_path: str, usar_cache: bool = False):
         self.template_path = template_path
+        # Criado só na primeira gravação em disco (a API em memória não toca no disco)
         self.output_dir = os.path.join(os.path.dirname(template_path), 'output')
-        os.makedirs(self.output_dir, exist_ok=True)
+        # Cache de renderização (reimpressões idênticas copiam o documento já gerado)
+        self.cache = obter_cache(os.path.join(self.output_dir, 'cache')) if usar_cache else None
+
+    @property
+    def template(self) -> TemplateCompilado:
+        return obter_template(self.template_path)
+
+    def _template_ooxml(self) -> TemplateOOXML:
+        template = self.template
+        with _templates_lock:
+            if template.ooxml is None:
+                template.ooxml = TemplateOOXML(template, self)
+        return template.ooxml
 
     def _limpar_celula(self, cell):
         """Remove todo o conteúdo da célula (parágrafos e tabelas internas)."""
@@ -24,36 +458,32 @@ class WordEtiquetaHandler:
             t._element.getparent().remove(t._element)
             
         
-    def _preencher_tabela(self, modelo_tabela, cell, dados):
+    def _preencher_tabela(self, template, cell, dados):
         # Faz uma cópia profunda do XML da tabela modelo
-        nova_tabela_element = deepcopy(modelo_tabela._element)
+        nova_tabela_element = deepcopy(template.modelo_xml)
 
         # Anexa essa cópia ao XML da célula de destino
         cell._element.append(nova_tabela_element)
+        nova_tabela = Table(nova_tabela_element, cell)
+
+        def substituir(m):
+            chave = m.group(1)
+            return str(dados[chave]) if chave in dados else m.group(0)
+
+        # Substitui os placeholders (posições pré-calculadas no template) em uma única passada
+        for (i, j, k), chaves in template.placeholders:
+            if not any(chave in dados for chave in chaves):
+                continue
+            p = Paragraph(nova_tabela_element.tr_lst[i].tc_lst[j].p_lst[k], nova_tabela)
+            novo_texto = _PLACEHOLDER_RE.sub(substituir, p.text)
+
+            # Cria um novo run com o texto substituído
+            p.clear()
+            run = p.add_run(novo_texto)
+            for chave in chaves:
+                for atributo, valor in REGRAS_FORMATACAO.get(chave, {}).items():
+                    setattr(run.font, atributo, valor)
 
-        # Recupera a tabela recém clonada (última da célula)
-        nova_tabela = cell.tables[-1]
-                
-        # Substitui os placeholders pelos valores
-        for i, row in enumerate(nova_tabela.rows):
-            for j, tgt_cell in enumerate(row.cells):
-                for p in tgt_cell.paragraphs:
-                    for key, value in dados.items():
-                        if f'{{{key}}}' in p.text:
-                                                              
-                            # Cria um novo run com o texto substituído
-                            if key == "receita":                                
-                                novo_texto =  p.text.replace(f'{{{key}}}', str(value))
-                                p.text = ''
-                                # Limpa os runs existentes
-                                for r in p.runs:
-                                    r.text = ""                                
-                                run = p.add_run(novo_texto)
-                                run.font.size = Pt(14)   # tamanho de fonte em pontos                            
-                            else:
-                                p.text = p.text.replace(f'{{{key}}}', str(value))
-                                
-                                
         #Remove visibilidade das bordas
         nova_tabela.style.style_id = 'None'
         nova_tabela.style.hidden   = False
@@ -61,64 +491,151 @@ class WordEtiquetaHandler:
 
     def _calcular_etiquetas_por_pagina(self) -> int:
         """Calcula quantas etiquetas cabem em uma página do template (colunas ímpares)."""
-        doc = Document(self.template_path)
+        return self.template.etiquetas_por_pagina
+
+    def _montar_dados(self, dados_lote: dict, extra_tags: dict | None = None) -> dict:
+        return montar_dados_etiqueta(dados_lote, extra_tags)
+
+    def _preencher_pagina(self, tabela_principal, pagina: list) -> int:
+        """Preenche os slots da tabela principal com `pagina` (dados por slot; None = slot
+        pulado, que é limpo para não imprimir o conteúdo do template).
+
+        Retorna quantas etiquetas foram preenchidas.
+        """
+        template = self.template
+        etiquetas_preenchidas = 0
+
+        rows = tabela_principal.rows
+        for (row_idx, col_idx), dados in zip(template.slots, pagina):
+            cell = rows[row_idx].cells[col_idx]
+            self._limpar_celula(cell)
+            if dados is None:
+                continue
+
+            self._preencher_tabela(template, cell, dados)
+            etiquetas_preenchidas += 1
+
+        return etiquetas_preenchidas
+
+    def _nova_pagina(self, doc):
+        """Acrescenta ao documento uma quebra de página e uma cópia limpa da tabela principal."""
+        ultima_tabela = doc.tables[-1]._element
+        quebra = _paragrafo_quebra_pagina()
+        nova_tabela = deepcopy(self.template.tabela_xml)
+        ultima_tabela.addnext(quebra)
+        quebra.addnext(nova_tabela)
+        return Table(nova_tabela, doc._body)
+
+    def _renderizar_docx(self, paginas):
+        """Monta com python-docx um documento com uma folha de etiquetas por página."""
+        doc = self.template.novo_documento()
         tabela = doc.tables[0]
-        etiquetas_por_pagina = 0
+        for n, pagina in enumerate(paginas):
+            if n:
+                tabela = self._nova_pagina(doc)
+            self._preencher_pagina(tabela, pagina)
+        return doc
 
-        for row in tabela.rows:
-            for col_idx in range(len(row.cells)):
-                if col_idx % 2 == 0:  # só colunas ímpares (0,2,4,...)
-                    etiquetas_por_pagina += 1
+    def _paginar(self, etiquetas, slot_inicial: int = 0):
+        return paginar(etiquetas, self._calcular_etiquetas_por_pagina(), slot_inicial)
+
+    def _caminho_saida(self, nome_arquivo: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, nome_arquivo)
+
+    def _escrever(self, paginas, destino, rapido: bool = False) -> None:
+        """Grava o documento em `destino` (caminho ou stream binário)."""
+        # Sem etiquetas o python-docx manteria a tabela do template e o caminho rápido nenhuma tabela
+        paginas = exigir_etiquetas(paginas)
+        if rapido:
+            self._template_ooxml().escrever(paginas, destino)
+        else:
+            self._renderizar_docx(paginas).save(destino)
 
-        return etiquetas_por_pagina
+    def _gravar(self, paginas, caminho_saida: str, rapido: bool = False, chave_cache: tuple | None = None) -> str:
+        chave = CacheRenderizacao.chave(self.template.hash, *chave_cache) if self.cache and chave_cache else None
+        if chave and self.cache.copiar_para(chave, caminho_saida):
+            return caminho_saida
 
-    def criar_etiquetas(self, dados_lote: dict, quantidade_total: int, pagina: int = 1, extra_tags: dict | None = None):
+        self._escrever(paginas, caminho_saida, rapido)
+
+        if chave:
+            self.cache.guardar(chave, caminho_saida)
+        return caminho_saida
+
+    def criar_etiquetas(self, dados_lote: dict, quantidade_total: int, pagina: int = 1, extra_tags: dict | None = None, rapido: bool = False):
         """Cria etiquetas em uma única página, respeitando o limite."""
-        doc = Document(self.template_path)
-
-        tabela_principal = doc.tables[0]
-        modelo_tabela = tabela_principal.cell(0, 0).tables[0]
-
-        dados = {
-            'lote': dados_lote.get('batchNo', ''),
-            'receita': dados_lote.get('name', ''),
-            'abv': f"{dados_lote.get('measuredAbv', '')}%" if dados_lote.get('measuredAbv') else '',
-            'ibu': str(dados_lote.get('estimatedIbu', '')),
-            'estimatedColor': str(dados_lote.get('estimatedColor', '')),
-            'data_brassagem': dados_lote.get('brewDate', ''),
-            'data_engarrafamento': dados_lote.get('bottling_event', {}).get('time', '') if dados_lote.get('bottling_event') else '',
-            'data_impressao': datetime.now().strftime('%d/%m/%Y %H:%M')
-        }
+        dados = self._montar_dados(dados_lote, extra_tags)
+        quantidade = min(quantidade_total, self._calcular_etiquetas_por_pagina())
 
-        if extra_tags:
-            for k, v in extra_tags.items():
-                if k not in dados:
-                    dados[k] = v
+        nome_arquivo = nome_arquivo_saida(f"etiqueta_{dados_lote['batchNo']}_p{pagina}", 'docx')
+        caminho_saida = self._caminho_saida(nome_arquivo)
+        return self._gravar([[dados] * quantidade], caminho_saida, rapido, ('pagina', dados, quantidade, extra_tags))
 
-        etiquetas_preenchidas = 0
+    def criar_etiquetas_rapido(self, dados_lote: dict, quantidade_total: int, pagina: int = 1, extra_tags: dict | None = None):
+        """Mesmo resultado de `criar_etiquetas`, gravando o OOXML diretamente (sem python-docx)."""
+        return self.criar_etiquetas(dados_lote, quantidade_total, pagina, extra_tags=extra_tags, rapido=True)
 
-        for row in tabela_principal.rows:
-            for col_idx, cell in enumerate(row.cells):
-                if etiquetas_preenchidas >= quantidade_total:
-                    break
+    def criar_documento_unico(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None, rapido: bool = False):
+        """Cria todas as etiquetas em um único documento, uma folha por página."""
+        dados = self._montar_dados(dados_lote, extra_tags)
+        nome_arquivo = nome_arquivo_saida(f"etiqueta_{dados_lote['batchNo']}", 'docx')
+        caminho_saida = self._caminho_saida(nome_arquivo)
+        paginas = self._paginar(repeat(dados, quantidade_total))
+        return self._gravar(paginas, caminho_saida, rapido, ('unico', dados, quantidade_total, extra_tags))
 
-                if col_idx % 2 == 1:  # pular colunas pares
-                    continue
+    def criar_etiquetas_mistas(self, entradas: list, slot_inicial: int = 0, rapido: bool = False):
+        """Empacota etiquetas de vários lotes em sequência, sem deixar slots vazios entre lotes.
 
-                self._limpar_celula(cell)
-                self._preencher_tabela(modelo_tabela, cell, dados)
-                etiquetas_preenchidas += 1
+        - entradas: lista de (dados_lote, quantidade) ou (dados_lote, quantidade, extra_tags)
+        - slot_inicial: quantos slots da primeira folha já foram usados (reaproveita folhas)
+        Gera um único documento e retorna o caminho.
+        """
+        lotes = []
+        for entrada in entradas:
+            dados_lote, quantidade = entrada[0], entrada[1]
+            extra_tags = entrada[2] if len(entrada) > 2 else None
+            lotes.append((self._montar_dados(dados_lote, extra_tags), quantidade, extra_tags))
 
-            if etiquetas_preenchidas >= quantidade_total:
-                break
+        etiquetas = (dados for dados, quantidade, _ in lotes for dados in repeat(dados, quantidade))
+        nome_arquivo = nome_arquivo_saida('etiqueta_misto', 'docx')
+        caminho_saida = self._caminho_saida(nome_arquivo)
+        paginas = self._paginar(etiquetas, slot_inicial)
+        return self._gravar(paginas, caminho_saida, rapido, ('misto', lotes, slot_inicial))
 
-        nome_arquivo = f"etiqueta_{dados_lote['batchNo']}_p{pagina}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-        caminho_saida = os.path.join(self.output_dir, nome_arquivo)
-        doc.save(caminho_saida)
-        return caminho_saida
+    # ------------------------
+    # API em memória (sem efeitos no sistema de arquivos)
+    # ------------------------
+
+    def renderizar_em_stream(self, stream, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None, rapido: bool = True) -> None:
+        """Escreve o documento com todas as etiquetas em `stream` (objeto binário gravável)."""
+        dados = self._montar_dados(dados_lote, extra_tags)
+        self._escrever(self._paginar(repeat(dados, quantidade_total)), stream, rapido)
+
+    def renderizar_bytes(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None, rapido: bool = True) -> bytes:
+        """Retorna o .docx com todas as etiquetas (documento único) como bytes."""
+        buffer = BytesIO()
+        self.renderizar_em_stream(buffer, dados_lote, quantidade_total, extra_tags=extra_tags, rapido=rapido)
+        return buffer.getvalue()
+
+    def gerar_paginas(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None, rapido: bool = True):
+        """Gerador: produz os bytes de um .docx por página assim que cada página fica pronta."""
+        dados = self._montar_dados(dados_lote, extra_tags)
+        for pagina in self._paginar(repeat(dados, quantidade_total)):
+            buffer = BytesIO()
+            self._escrever([pagina], buffer, rapido)
+            yield buffer.getvalue()
+
+    def criar_multiplas_paginas(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None, documento_unico: bool = False, rapido: bool = False):
+        """Divide a geração de etiquetas em múltiplas páginas se necessário.
+
+        Com `documento_unico=True` todas as páginas vão para um só arquivo .docx
+        (salvo uma única vez); caso contrário é gerado um arquivo por página.
+        Com `rapido=True` usa o gravador OOXML direto em vez do python-docx.
+        """
+        if documento_unico:
+            return [self.criar_documento_unico(dados_lote, quantidade_total, extra_tags=extra_tags, rapido=rapido)]
 
-    def criar_multiplas_paginas(self, dados_lote: dict, quantidade_total: int, extra_tags: dict | None = None):
-        """Divide a geração de etiquetas em múltiplas páginas se necessário."""
         etiquetas_por_pagina = self._calcular_etiquetas_por_pagina()
         paginas_necessarias = (quantidade_total + etiquetas_por_pagina - 1) // etiquetas_por_pagina
 
@@ -127,7 +644,7 @@ class WordEtiquetaHandler:
 
         for pagina in range(1, paginas_necessarias + 1):
             qtd_nesta_pagina = min(restantes, etiquetas_por_pagina)
-            arquivo = self.criar_etiquetas(dados_lote, qtd_nesta_pagina, pagina, extra_tags=extra_tags)
+            arquivo = self.criar_etiquetas(dados_lote, qtd_nesta_pagina, pagina, extra_tags=extra_tags, rapido=rapido)
             arquivos.append(arquivo)
             restantes -= qtd_nesta_pagina
 